@@ -1,61 +1,204 @@
-print('Лабораторная N°1')
-print('Ротару Ксения Алексеевна. Гр.4354\n\n')
+import argparse
+import heapq
+import json
+import mmap
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
 
-n = int(input('Введите кол-во элементов в массиве: '))
-A = []
-print('Введите элементы массива через enter:')
-for i in range(n):
-    A.append(int(input(f'{i}: ')))
+SORT_INFO = {
+    "selection": ("СОРТИРОВКА ВЫБОРОМ:", "Временная сложность: O(n²) в худшем, среднем и лучшем случае"),
+    "insertion": ("СОРТИРОВКА ВСТАВКАМИ:", "Временная сложность: O(n²) в худшем и среднем случае, O(n) в лучшем случае"),
+    "binary_insertion": ("СОРТИРОВКА ДВОИЧНЫМИ ВСТАВКАМИ:",
+                         "Временная сложность: O(n log n) сравнений, O(n²) перемещений (блочный сдвиг)"),
+    "merge": ("СОРТИРОВКА СЛИЯНИЕМ:", "Временная сложность: O(n log n) во всех случаях"),
+    "heap": ("СОРТИРОВКА КУЧЕЙ:", "Временная сложность: O(n log n) во всех случаях"),
+    "merge_bottom_up": ("ВОСХОДЯЩАЯ СОРТИРОВКА СЛИЯНИЕМ:",
+                        "Временная сложность: O(n log n), O(n) на уже упорядоченных данных"),
+    "heap_iterative": ("СОРТИРОВКА КУЧЕЙ (ИТЕРАТИВНОЕ ПРОСЕИВАНИЕ):",
+                       "Временная сложность: O(n log n) во всех случаях, ~2n log n сравнений"),
+    "heap_floyd": ("СОРТИРОВКА КУЧЕЙ (ПРОСЕИВАНИЕ ФЛОЙДА):",
+                   "Временная сложность: O(n log n) во всех случаях, ~n log n сравнений"),
+    "parallel_merge": ("ПАРАЛЛЕЛЬНАЯ СОРТИРОВКА СЛИЯНИЕМ:",
+                       "Временная сложность: O(n log n / p) на сортировку частей, O(n / p) на каждый из log p уровней слияния"),
+    "hybrid": ("ГИБРИДНАЯ АДАПТИВНАЯ СОРТИРОВКА:",
+               "Временная сложность: O(n) на упорядоченных данных, O(n log r) для r серий, O(n log n) в худшем случае"),
+}
 
-def Selection_Sort(arr, n):
-    print('\n\nСОРТИРОВКА ВЫБОРОМ:')
+COUNTER_LABELS = {
+    "strategy": "Стратегия",
+    "comparisons": "Сравнения",
+    "swaps": "Обмены",
+    "shifts": "Сдвиги",
+    "moves": "Перемещения",
+    "order_checks": "Проверки порядка серий",
+    "workers": "Процессы",
+    "runs": "Серии",
+    "passes": "Проходы слияния",
+    "bytes_read": "Прочитано байт",
+    "bytes_written": "Записано байт",
+}
+
+
+class StdoutSink:
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def emit(self, event, *data):
+        out = self.stream if self.stream is not None else sys.stdout
+        if event == "start":
+            name, arr = data
+            print('\n\n' + SORT_INFO[name][0], file=out)
+            print(arr, file=out)
+        elif event == "pass":
+            print(data[0], file=out)
+        elif event == "merge":
+            print("Слияние:", data[0], "и", data[1], "->", data[2], file=out)
+        elif event == "heapify":
+            print("Перестройка кучи:", data[0], file=out)
+        elif event == "extract":
+            print("Извлечение максимума:", data[0], file=out)
+        elif event == "done":
+            name, counters = data
+            summary = ", ".join(f"{COUNTER_LABELS[key]}: {value}" for key, value in counters.items())
+            print(f"\n{summary}", file=out)
+            print(SORT_INFO[name][1], file=out)
+
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, *data):
+        self.events.append((event,) + tuple(item[:] if isinstance(item, list) else item for item in data))
+
+
+class FileSink:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def emit(self, event, *data):
+        self.file.write(json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _finish(name, counters, emit, stats):
+    if stats is not None:
+        stats.update(counters)
+    if emit:
+        emit("done", name, counters)
+
+
+def Selection_Sort(arr, n, trace=None, stats=None):
+    emit = trace.emit if trace is not None else None
     comparisons = 0
     swaps = 0
     cur = 0
-    print(arr)
+    if emit:
+        emit("start", "selection", arr)
     while cur < n - 1:
         mn = cur
         for i in range(cur + 1, n):
             comparisons += 1
+            if emit:
+                emit("compare", mn, i)
             if arr[mn] > arr[i]:
                 mn = i
         if mn != cur:
             swaps += 1
             arr[cur], arr[mn] = arr[mn], arr[cur]
+            if emit:
+                emit("swap", cur, mn)
         cur += 1
-        print(arr)
-    
-    print(f"\nСравнения: {comparisons}, Обмены: {swaps}")
-    print("Временная сложность: O(n²) в худшем, среднем и лучшем случае")
+        if emit:
+            emit("pass", arr)
+
+    _finish("selection", {"comparisons": comparisons, "swaps": swaps}, emit, stats)
     return arr
 
-def Insertion_Sort(arr, n):
-    print('\n\nСОРТИРОВКА ВСТАВКАМИ:')
+def Insertion_Sort(arr, n, trace=None, stats=None):
+    emit = trace.emit if trace is not None else None
     comparisons = 0
     swaps = 0
-    print(arr)
+    if emit:
+        emit("start", "insertion", arr)
     for i in range(1, n):
         key = arr[i]
         j = i - 1
         while j >= 0:
             comparisons += 1
+            if emit:
+                emit("compare", j, i)
             if arr[j] > key:
                 swaps += 1
                 arr[j + 1] = arr[j]
+                if emit:
+                    emit("shift", j, j + 1)
                 j -= 1
             else:
                 break
         arr[j + 1] = key
-        print(arr)
-    
-    print(f"\nСравнения: {comparisons}, Сдвиги: {swaps}")
-    print("Временная сложность: O(n²) в худшем и среднем случае, O(n) в лучшем случае")
+        if emit:
+            emit("pass", arr)
+
+    _finish("insertion", {"comparisons": comparisons, "shifts": swaps}, emit, stats)
     return arr
 
-def Merge_Sort(arr, n):
-    print('\n\nСОРТИРОВКА СЛИЯНИЕМ:')
+SLICE_SHIFT_RATIO = 16
+
+def Binary_Insertion_Sort(arr, n, trace=None, stats=None):
+    emit = trace.emit if trace is not None else None
+    comparisons = 0
+    moves = 0
+    if emit:
+        emit("start", "binary_insertion", arr)
+    for i in range(1, n):
+        key = arr[i]
+        lo, hi = 0, i
+        while lo < hi:
+            mid = (lo + hi) // 2
+            comparisons += 1
+            if emit:
+                emit("compare", i, mid)
+            if key < arr[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo < i:
+            if (i - lo) * SLICE_SHIFT_RATIO < 2 * n - lo - i:
+                arr[lo + 1:i + 1] = arr[lo:i]
+                arr[lo] = key
+            else:
+                arr.insert(lo, arr.pop(i))
+            moves += i - lo
+            if emit:
+                emit("shift", lo, i)
+        if emit:
+            emit("pass", arr)
+
+    _finish("binary_insertion", {"comparisons": comparisons, "moves": moves}, emit, stats)
+    return arr
+
+def Merge_Sort(arr, n, trace=None, stats=None):
+    emit = trace.emit if trace is not None else None
     comparisons = [0]
-    print(arr)
+    if emit:
+        emit("start", "merge", arr)
     
     def merge_sort_util(lst):
         if len(lst) <= 1:
@@ -66,7 +209,8 @@ def Merge_Sort(arr, n):
         right = merge_sort_util(lst[mid:])
         
         merged = merge(left, right)
-        print("Слияние:", left, "и", right, "->", merged)
+        if emit:
+            emit("merge", left, right, merged)
         return merged
         
     def merge(left, right):
@@ -74,6 +218,8 @@ def Merge_Sort(arr, n):
         i = j = 0
         while i < len(left) and j < len(right):
             comparisons[0] += 1
+            if emit:
+                emit("compare", left[i], right[j])
             if left[i] <= right[j]:
                 result.append(left[i])
                 i += 1
@@ -88,15 +234,75 @@ def Merge_Sort(arr, n):
     for i in range(n):
         arr[i] = sorted_arr[i]
     
-    print(f"\nСравнения: {comparisons[0]}")
-    print("Временная сложность: O(n log n) во всех случаях")
+    _finish("merge", {"comparisons": comparisons[0]}, emit, stats)
     return arr
 
-def Heap_Sort(arr, n):
-    print('\n\nСОРТИРОВКА КУЧЕЙ:')
+COPY_CHUNK = 4096
+
+def _copy_range(src, src_lo, dst, dst_lo, count):
+    for offset in range(0, count, COPY_CHUNK):
+        size = min(COPY_CHUNK, count - offset)
+        dst[dst_lo + offset:dst_lo + offset + size] = src[src_lo + offset:src_lo + offset + size]
+
+def _merge_runs(src, dst, lo, mid, hi):
+    comparisons = 0
+    i, j, k = lo, mid, lo
+    while i < mid and j < hi:
+        comparisons += 1
+        if src[i] <= src[j]:
+            dst[k] = src[i]
+            i += 1
+        else:
+            dst[k] = src[j]
+            j += 1
+        k += 1
+    if i < mid:
+        _copy_range(src, i, dst, k, mid - i)
+    else:
+        _copy_range(src, j, dst, k, hi - j)
+    return comparisons
+
+def Merge_Sort_BottomUp(arr, n, trace=None, stats=None):
+    emit = trace.emit if trace is not None else None
+    comparisons = 0
+    order_checks = 0
+    if emit:
+        emit("start", "merge_bottom_up", arr)
+
+    src = arr
+    dst = [None] * n
+    width = 1
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+
+            if mid < hi:
+                order_checks += 1
+            if mid >= hi or src[mid - 1] <= src[mid]:
+                _copy_range(src, lo, dst, lo, hi - lo)
+                continue
+
+            comparisons += _merge_runs(src, dst, lo, mid, hi)
+
+            if emit:
+                emit("merge", src[lo:mid], src[mid:hi], dst[lo:hi])
+
+        src, dst = dst, src
+        width *= 2
+
+    if src is not arr:
+        _copy_range(src, 0, arr, 0, n)
+
+    _finish("merge_bottom_up", {"comparisons": comparisons, "order_checks": order_checks}, emit, stats)
+    return arr
+
+def Heap_Sort(arr, n, trace=None, stats=None):
+    emit = trace.emit if trace is not None else None
     comparisons = [0]
     swaps = [0]
-    print(arr)
+    if emit:
+        emit("start", "heap", arr)
     
     def heapify(heap_size, root_index):
         largest = root_index
@@ -105,18 +311,24 @@ def Heap_Sort(arr, n):
 
         if left_child < heap_size:
             comparisons[0] += 1
+            if emit:
+                emit("compare", left_child, largest)
             if arr[left_child] > arr[largest]:
                 largest = left_child
 
         if right_child < heap_size:
             comparisons[0] += 1
+            if emit:
+                emit("compare", right_child, largest)
             if arr[right_child] > arr[largest]:
                 largest = right_child
 
         if largest != root_index:
             swaps[0] += 1
             arr[root_index], arr[largest] = arr[largest], arr[root_index]
-            print("Перестройка кучи:", arr)
+            if emit:
+                emit("swap", root_index, largest)
+                emit("heapify", arr)
             heapify(heap_size, largest)
     
     for i in range(n // 2 - 1, -1, -1):
@@ -125,19 +337,733 @@ def Heap_Sort(arr, n):
     for i in range(n-1, 0, -1):
         swaps[0] += 1
         arr[0], arr[i] = arr[i], arr[0]
-        print("Извлечение максимума:", arr)
+        if emit:
+            emit("swap", 0, i)
+            emit("extract", arr)
         heapify(i, 0)
     
-    print(f"\nСравнения: {comparisons[0]}, Обмены: {swaps[0]}")
-    print("Временная сложность: O(n log n) во всех случаях")
+    _finish("heap", {"comparisons": comparisons[0], "swaps": swaps[0]}, emit, stats)
     return arr
 
-A_copy1 = A.copy()
-A_copy2 = A.copy()
-A_copy3 = A.copy()
-A_copy4 = A.copy()
+def _hole_heap_sort(arr, n, trace, stats, name, floyd):
+    emit = trace.emit if trace is not None else None
+    comparisons = 0
+    swaps = 0
+    moves = 0
+    if emit:
+        emit("start", name, arr)
+
+    def sift_down(hole, size, value):
+        nonlocal comparisons, moves
+        root = hole
+        child = 2 * hole + 1
+        while child < size:
+            if child + 1 < size:
+                comparisons += 1
+                if arr[child + 1] > arr[child]:
+                    child += 1
+            if not floyd:
+                comparisons += 1
+                if arr[child] <= value:
+                    break
+            arr[hole] = arr[child]
+            moves += 1
+            hole = child
+            child = 2 * hole + 1
+
+        if floyd:
+            while hole > root:
+                parent = (hole - 1) // 2
+                comparisons += 1
+                if arr[parent] >= value:
+                    break
+                arr[hole] = arr[parent]
+                moves += 1
+                hole = parent
+
+        arr[hole] = value
+
+    for i in range(n // 2 - 1, -1, -1):
+        sift_down(i, n, arr[i])
+        if emit:
+            emit("heapify", arr)
+
+    for i in range(n - 1, 0, -1):
+        value = arr[i]
+        arr[i] = arr[0]
+        swaps += 1
+        sift_down(0, i, value)
+        if emit:
+            emit("extract", arr)
+
+    _finish(name, {"comparisons": comparisons, "swaps": swaps, "moves": moves}, emit, stats)
+    return arr
+
+def Heap_Sort_Iterative(arr, n, trace=None, stats=None):
+    return _hole_heap_sort(arr, n, trace, stats, "heap_iterative", False)
+
+def Heap_Sort_Floyd(arr, n, trace=None, stats=None):
+    return _hole_heap_sort(arr, n, trace, stats, "heap_floyd", True)
+
+SMALL_SORT = 32
+MIN_RUN = 32
+INVERSION_SAMPLE = 64
+INSERTION_BUDGET = 4
+
+def _count_descents(arr, n):
+    descents = 0
+    for i in range(1, n):
+        if arr[i - 1] > arr[i]:
+            descents += 1
+    return descents
+
+def _run_bounds(arr, n):
+    bounds = [0]
+    for i in range(1, n):
+        if arr[i - 1] > arr[i]:
+            bounds.append(i)
+    bounds.append(n)
+    return bounds
+
+def _sample_inversions(arr, n):
+    rng = random.Random(n)
+    inversions = 0
+    for _ in range(INVERSION_SAMPLE):
+        i, j = sorted(rng.sample(range(n), 2))
+        if arr[i] > arr[j]:
+            inversions += 1
+    return inversions / INVERSION_SAMPLE
+
+def _insertion_with_budget(arr, n, budget):
+    comparisons = 0
+    shifts = 0
+    for i in range(1, n):
+        key = arr[i]
+        j = i - 1
+        while j >= 0:
+            comparisons += 1
+            if arr[j] > key:
+                arr[j + 1] = arr[j]
+                shifts += 1
+                j -= 1
+            else:
+                break
+        arr[j + 1] = key
+        if shifts > budget:
+            return comparisons, shifts, False
+    return comparisons, shifts, True
+
+def _merge_bounds(arr, n, bounds, emit):
+    comparisons = 0
+    moves = 0
+    src = arr
+    dst = [None] * n
+    while len(bounds) > 2:
+        merged_bounds = [0]
+        for t in range(0, len(bounds) - 1, 2):
+            lo = bounds[t]
+            mid = bounds[t + 1]
+            hi = bounds[t + 2] if t + 2 < len(bounds) else mid
+            moves += hi - lo
+
+            if mid < hi:
+                comparisons += 1
+            if mid >= hi or src[mid - 1] <= src[mid]:
+                _copy_range(src, lo, dst, lo, hi - lo)
+            else:
+                comparisons += _merge_runs(src, dst, lo, mid, hi)
+                if emit:
+                    emit("merge", src[lo:mid], src[mid:hi], dst[lo:hi])
+            merged_bounds.append(hi)
+
+        bounds = merged_bounds
+        src, dst = dst, src
+
+    if src is not arr:
+        _copy_range(src, 0, arr, 0, n)
+        moves += n
+    return comparisons, moves
+
+def Hybrid_Sort(arr, n, trace=None, stats=None, in_place=False):
+    emit = trace.emit if trace is not None else None
+    if emit:
+        emit("start", "hybrid", arr)
+    comparisons = 0
+    moves = 0
+    part = {}
+
+    if n <= SMALL_SORT:
+        strategy = "insertion"
+        Insertion_Sort(arr, n, None, part)
+        comparisons += part["comparisons"]
+        moves += part["shifts"]
+        _finish("hybrid", {"strategy": strategy, "comparisons": comparisons, "moves": moves}, emit, stats)
+        return arr
+
+    descents = _count_descents(arr, n)
+    comparisons += n - 1
+    prefix = ""
+
+    if descents > 0 and descents < n - 1 and not in_place and descents + 1 > n // MIN_RUN:
+        comparisons += INVERSION_SAMPLE
+        if _sample_inversions(arr, n) >= 0.75:
+            prefix = "reversed+"
+            arr.reverse()
+            moves += n
+            descents = _count_descents(arr, n)
+            comparisons += n - 1
+
+    if descents == 0:
+        strategy = "sorted"
+    elif descents == n - 1:
+        strategy = "reversed"
+        arr.reverse()
+        moves += n
+    elif in_place:
+        strategy = "heap"
+        Heap_Sort_Floyd(arr, n, None, part)
+        comparisons += part["comparisons"]
+        moves += part["swaps"] + part["moves"]
+    elif descents + 1 > n // MIN_RUN:
+        strategy = "merge"
+        Merge_Sort_BottomUp(arr, n, None, part)
+        comparisons += part["comparisons"] + part["order_checks"]
+        passes = (n - 1).bit_length()
+        moves += n * passes + (n if passes % 2 else 0)
+    else:
+        insertion_comparisons, shifts, finished = _insertion_with_budget(arr, n, n // INSERTION_BUDGET)
+        comparisons += insertion_comparisons
+        moves += shifts
+        if finished:
+            strategy = "insertion"
+        else:
+            strategy = "runs"
+            bounds = _run_bounds(arr, n)
+            comparisons += n - 1
+            merge_comparisons, merge_moves = _merge_bounds(arr, n, bounds, emit)
+            comparisons += merge_comparisons
+            moves += merge_moves
+
+    _finish("hybrid", {"strategy": prefix + strategy, "comparisons": comparisons, "moves": moves}, emit, stats)
+    return arr
+
+PARALLEL_THRESHOLD = 200000
+
+def _sort_partition(name, lo, hi, sort):
+    shm = shared_memory.SharedMemory(name=name)
+    view = shm.buf.cast("q")
+    try:
+        part = view[lo:hi].tolist()
+        stats = {}
+        sort(part, hi - lo, None, stats)
+        view[lo:hi] = array("q", part)
+        return stats.get("comparisons", 0) + stats.get("order_checks", 0)
+    finally:
+        view.release()
+        shm.close()
+
+def _merge_segment(src_name, dst_name, a_lo, a_hi, b_lo, b_hi, out_lo):
+    src_shm = shared_memory.SharedMemory(name=src_name)
+    dst_shm = shared_memory.SharedMemory(name=dst_name)
+    src = src_shm.buf.cast("q")
+    dst = dst_shm.buf.cast("q")
+    try:
+        values = src[a_lo:a_hi].tolist() + src[b_lo:b_hi].tolist()
+        merged = [None] * len(values)
+        comparisons = _merge_runs(values, merged, 0, a_hi - a_lo, len(values))
+        dst[out_lo:out_lo + len(merged)] = array("q", merged)
+        return comparisons
+    finally:
+        src.release()
+        dst.release()
+        src_shm.close()
+        dst_shm.close()
+
+def _co_rank(view, k, lo, mid, hi):
+    i_lo = max(0, k - (hi - mid))
+    i_hi = min(k, mid - lo)
+    while i_lo < i_hi:
+        i = (i_lo + i_hi) // 2
+        if view[lo + i] <= view[mid + k - i - 1]:
+            i_lo = i + 1
+        else:
+            i_hi = i
+    return i_lo
+
+def _merge_tasks(view, lo, mid, hi, pieces):
+    tasks = []
+    prev_k = prev_i = 0
+    for piece in range(1, pieces + 1):
+        k = (hi - lo) * piece // pieces
+        i = _co_rank(view, k, lo, mid, hi)
+        if k > prev_k:
+            tasks.append((lo + prev_i, lo + i, mid + prev_k - prev_i, mid + k - i, lo + prev_k))
+        prev_k, prev_i = k, i
+    return tasks
+
+def Parallel_Merge_Sort(arr, n, trace=None, stats=None, workers=None, threshold=PARALLEL_THRESHOLD,
+                        sort=Merge_Sort_BottomUp):
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or n < threshold or n < 2:
+        return sort(arr, n, trace, stats)
+
+    emit = trace.emit if trace is not None else None
+    buffers = [shared_memory.SharedMemory(create=True, size=n * 8) for _ in range(2)]
+    views = [shm.buf.cast("q") for shm in buffers]
+    try:
+        try:
+            for lo in range(0, n, READ_CHUNK):
+                hi = min(lo + READ_CHUNK, n)
+                views[0][lo:hi] = array("q", arr[lo:hi])
+        except (OverflowError, TypeError):
+            return sort(arr, n, trace, stats)
+
+        if emit:
+            emit("start", "parallel_merge", arr)
+
+        bounds = [n * part // workers for part in range(workers + 1)]
+        runs = [(bounds[part], bounds[part + 1]) for part in range(workers) if bounds[part] < bounds[part + 1]]
+        comparisons = 0
+        current = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_sort_partition, buffers[0].name, lo, hi, sort) for lo, hi in runs]
+            comparisons += sum(future.result() for future in futures)
+
+            while len(runs) > 1:
+                pieces = max(1, workers // (len(runs) // 2))
+                merged_runs = []
+                futures = []
+                for index in range(0, len(runs), 2):
+                    if index + 1 == len(runs):
+                        lo, hi = runs[index]
+                        futures.append(pool.submit(_merge_segment, buffers[current].name, buffers[1 - current].name,
+                                                   lo, hi, hi, hi, lo))
+                        merged_runs.append((lo, hi))
+                        continue
+                    lo, mid = runs[index]
+                    hi = runs[index + 1][1]
+                    for a_lo, a_hi, b_lo, b_hi, out_lo in _merge_tasks(views[current], lo, mid, hi, pieces):
+                        futures.append(pool.submit(_merge_segment, buffers[current].name, buffers[1 - current].name,
+                                                   a_lo, a_hi, b_lo, b_hi, out_lo))
+                    merged_runs.append((lo, hi))
+                comparisons += sum(future.result() for future in futures)
+                runs = merged_runs
+                current = 1 - current
+
+        for lo in range(0, n, READ_CHUNK):
+            hi = min(lo + READ_CHUNK, n)
+            arr[lo:hi] = views[current][lo:hi].tolist()
+    finally:
+        for view in views:
+            view.release()
+        for shm in buffers:
+            shm.close()
+            shm.unlink()
+
+    _finish("parallel_merge", {"strategy": "parallel", "workers": workers, "comparisons": comparisons}, emit, stats)
+    return arr
+
+def _measure(sort, data):
+    arr = data.copy()
+    started = time.perf_counter()
+    stats = {}
+    sort(arr, len(arr), None, stats)
+    elapsed = time.perf_counter() - started
+
+    arr = data.copy()
+    tracemalloc.start()
+    sort(arr, len(arr))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_bytes": peak, **stats}
+
+def benchmark_input(kind, n, rng):
+    if kind == "random":
+        return [rng.randrange(n) for _ in range(n)]
+    if kind == "sorted":
+        return list(range(n))
+    if kind == "reversed":
+        return list(range(n, 0, -1))
+    if kind == "few-unique":
+        return [rng.randrange(10) for _ in range(n)]
+
+    data = list(range(n))
+    if kind == "nearly-sorted":
+        for _ in range(n // 100):
+            i, j = rng.randrange(n), rng.randrange(n)
+            data[i], data[j] = data[j], data[i]
+        return data
+    if kind == "local":
+        for _ in range(n // 100):
+            i = rng.randrange(n - 1)
+            data[i], data[i + 1] = data[i + 1], data[i]
+        return data
+    if kind == "runs":
+        data = []
+        while len(data) < n:
+            data.extend(sorted(rng.randrange(n) for _ in range(rng.randrange(1, 1000))))
+        return data[:n]
+    raise ValueError(f"Неизвестный вид входных данных: {kind}")
+
+def benchmark_sorts(sorts, n=100000, seed=0, kinds=("random", "sorted", "reversed")):
+    rng = random.Random(seed)
+    results = []
+    for kind in kinds:
+        data = benchmark_input(kind, n, rng)
+        for sort in sorts:
+            results.append({"input": kind, "sort": sort.__name__, **_measure(sort, data)})
+    return results
+
+def print_benchmark(results):
+    print(f"{'Данные':<13} {'Сортировка':<22} {'Время, с':>10} {'Пик памяти, КБ':>15} {'Сравнения':>12}  Прочие счётчики")
+    for row in results:
+        extra = ", ".join(f"{COUNTER_LABELS[key]}: {row[key]}"
+                          for key in ("strategy", "swaps", "shifts", "moves", "order_checks") if key in row)
+        print(f"{row['input']:<13} {row['sort']:<22} {row['seconds']:>10.3f} "
+              f"{row['peak_bytes'] / 1024:>15.1f} {row['comparisons']:>12}  {extra}")
+
+def benchmark_merge_sorts(n=100000, seed=0):
+    return benchmark_sorts([Merge_Sort, Merge_Sort_BottomUp], n, seed)
+
+def benchmark_insertion_sorts(n=5000, seed=0):
+    return benchmark_sorts([Insertion_Sort, Binary_Insertion_Sort], n, seed)
+
+def benchmark_heap_sorts(n=100000, seed=0):
+    return benchmark_sorts([Heap_Sort, Heap_Sort_Iterative, Heap_Sort_Floyd], n, seed)
+
+HYBRID_KINDS = ("random", "sorted", "reversed", "nearly-sorted", "local", "runs", "few-unique")
+
+def benchmark_hybrid(n=100000, seed=0):
+    results = []
+    for kind in HYBRID_KINDS:
+        sorts = [Merge_Sort, Merge_Sort_BottomUp, Heap_Sort_Floyd, Hybrid_Sort]
+        if kind in ("sorted", "local"):
+            sorts.insert(0, Insertion_Sort)
+        results.extend(benchmark_sorts(sorts, n, seed, (kind,)))
+    return results
+
+PARALLEL_WORKERS = (1, 2, 4)
+
+def benchmark_parallel(n=1000000, seed=0, workers=None):
+    counts = sorted(set(workers or PARALLEL_WORKERS) | {os.cpu_count() or 1})
+    rng = random.Random(seed)
+    data = [rng.randrange(-n, n) for _ in range(n)]
+    expected = sorted(data)
+
+    arr = data.copy()
+    started = time.perf_counter()
+    Merge_Sort_BottomUp(arr, n)
+    serial = time.perf_counter() - started
+
+    results = [{"workers": 0, "seconds": serial, "speedup": 1.0}]
+    for count in counts:
+        arr = data.copy()
+        started = time.perf_counter()
+        Parallel_Merge_Sort(arr, n, workers=count, threshold=0)
+        elapsed = time.perf_counter() - started
+        if arr != expected:
+            raise AssertionError(f"Параллельная сортировка на {count} процессах дала неверный результат")
+        results.append({"workers": count, "seconds": elapsed, "speedup": serial / elapsed})
+    return results
+
+def print_parallel(results):
+    print(f"Ядер процессора: {os.cpu_count()}")
+    print(f"{'Процессы':<12} {'Время, с':>10} {'Ускорение':>10}")
+    for row in results:
+        label = "последов." if row["workers"] == 0 else str(row["workers"])
+        print(f"{label:<12} {row['seconds']:>10.3f} {row['speedup']:>9.2f}x")
+
+SORTS = {
+    "selection": Selection_Sort,
+    "insertion": Insertion_Sort,
+    "binary-insertion": Binary_Insertion_Sort,
+    "merge": Merge_Sort,
+    "merge-bottom-up": Merge_Sort_BottomUp,
+    "heap": Heap_Sort,
+    "heap-iterative": Heap_Sort_Iterative,
+    "heap-floyd": Heap_Sort_Floyd,
+    "hybrid": Hybrid_Sort,
+    "parallel-merge": Parallel_Merge_Sort,
+}
+
+BINARY_FORMATS = {"int32": "i", "int64": "q"}
+READ_CHUNK = 1 << 20
+
+def _open_input(path, binary):
+    if path == "-":
+        return sys.stdin.buffer if binary else sys.stdin
+    return open(path, "rb" if binary else "r", encoding=None if binary else "utf-8")
+
+def _open_output(path, binary):
+    if path == "-":
+        return sys.stdout.buffer if binary else sys.stdout
+    return open(path, "wb" if binary else "w", encoding=None if binary else "utf-8")
+
+def _close_stream(stream):
+    if stream not in (sys.stdin, sys.stdin.buffer, sys.stdout, sys.stdout.buffer):
+        stream.close()
+
+def _text_blocks(stream, chunk_size=READ_CHUNK, io_stats=None):
+    tail = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if io_stats is not None:
+            io_stats["bytes_read"] += len(chunk)
+        chunk = tail + chunk
+        parts = chunk.split()
+        tail = parts.pop() if parts and not chunk[-1].isspace() else ""
+        yield list(map(int, parts))
+    if tail:
+        yield [int(tail)]
+
+def _binary_blocks(stream, fmt, chunk_items=READ_CHUNK, io_stats=None):
+    itemsize = array(BINARY_FORMATS[fmt]).itemsize
+    while True:
+        chunk = stream.read(chunk_items * itemsize)
+        if not chunk:
+            break
+        if len(chunk) % itemsize:
+            raise ValueError(f"Размер входных данных не кратен {itemsize} байтам")
+        if io_stats is not None:
+            io_stats["bytes_read"] += len(chunk)
+        yield array(BINARY_FORMATS[fmt], chunk).tolist()
+
+def load_text(stream):
+    values = []
+    for block in _text_blocks(stream):
+        values.extend(block)
+    return values
+
+def load_binary(stream, fmt):
+    values = []
+    for block in _binary_blocks(stream, fmt):
+        values.extend(block)
+    return values
+
+def load_mmap(path, fmt):
+    itemsize = array(BINARY_FORMATS[fmt]).itemsize
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size % itemsize:
+            raise ValueError(f"Размер входных данных не кратен {itemsize} байтам")
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped).cast(BINARY_FORMATS[fmt])
+            try:
+                return view.tolist()
+            finally:
+                view.release()
+
+def load_array(path, fmt="text", use_mmap=False):
+    if fmt == "text":
+        if path == "-":
+            return load_text(sys.stdin)
+        with _open_input(path, False) as f:
+            return load_text(f)
+    if use_mmap and path != "-":
+        return load_mmap(path, fmt)
+    if path == "-":
+        return load_binary(sys.stdin.buffer, fmt)
+    with _open_input(path, True) as f:
+        return load_binary(f, fmt)
+
+def _write_values(out, values, fmt):
+    if not values:
+        return 0
+    if fmt == "text":
+        data = "\n".join(map(str, values)) + "\n"
+    else:
+        data = array(BINARY_FORMATS[fmt], values).tobytes()
+    out.write(data)
+    return len(data)
+
+def save_array(values, path, fmt="text"):
+    out = _open_output(path, fmt != "text")
+    try:
+        for start in range(0, len(values), READ_CHUNK):
+            _write_values(out, values[start:start + READ_CHUNK], fmt)
+    finally:
+        _close_stream(out)
+
+EXTERNAL_MEMORY = 64 << 20
+EXTERNAL_FAN_IN = 16
+ITEM_BYTES = 40
+RUN_FORMAT = "int64"
+
+def _input_blocks(path, fmt, chunk_items, io_stats):
+    stream = _open_input(path, fmt != "text")
+    try:
+        if fmt == "text":
+            yield from _text_blocks(stream, chunk_items, io_stats)
+        else:
+            yield from _binary_blocks(stream, fmt, chunk_items, io_stats)
+    finally:
+        _close_stream(stream)
+
+def _spill_run(values, directory, buffer_items, io_stats):
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        for start in range(0, len(values), buffer_items):
+            io_stats["bytes_written"] += _write_values(f, values[start:start + buffer_items], RUN_FORMAT)
+    return path
+
+def _read_run(path, buffer_items, io_stats):
+    try:
+        with open(path, "rb") as f:
+            for block in _binary_blocks(f, RUN_FORMAT, buffer_items, io_stats):
+                yield from block
+    finally:
+        os.remove(path)
+
+def _merge_files(paths, out, fmt, buffer_items, io_stats):
+    merged = heapq.merge(*(_read_run(path, buffer_items, io_stats) for path in paths))
+    while True:
+        block = list(islice(merged, buffer_items))
+        if not block:
+            break
+        io_stats["bytes_written"] += _write_values(out, block, fmt)
+
+def External_Sort(input_path, output_path, fmt="int64", output_format=None, memory=EXTERNAL_MEMORY,
+                  fan_in=EXTERNAL_FAN_IN, sort=Hybrid_Sort, tmp_dir=None, stats=None):
+    if fan_in < 2:
+        raise ValueError("Степень слияния должна быть не меньше 2")
+    output_format = output_format or fmt
+    run_items = max(1, memory // ITEM_BYTES)
+    buffer_items = max(1, memory // ((fan_in + 1) * ITEM_BYTES))
+    io_stats = {"bytes_read": 0, "bytes_written": 0}
+    total = 0
+    runs = 0
+    passes = 0
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir, prefix="extsort-") as directory:
+        paths = []
+        current = []
+        for block in _input_blocks(input_path, fmt, min(READ_CHUNK, max(1, run_items // 8)), io_stats):
+            total += len(block)
+            while block:
+                take = run_items - len(current)
+                current.extend(block[:take])
+                block = block[take:]
+                if len(current) == run_items:
+                    paths.append(_spill_run(sort(current, len(current)), directory, buffer_items, io_stats))
+                    current = []
+        if current:
+            paths.append(_spill_run(sort(current, len(current)), directory, buffer_items, io_stats))
+        current = None
+        runs = len(paths)
+
+        while len(paths) > fan_in:
+            merged_paths = []
+            for start in range(0, len(paths), fan_in):
+                fd, path = tempfile.mkstemp(dir=directory, suffix=".run")
+                with os.fdopen(fd, "wb") as f:
+                    _merge_files(paths[start:start + fan_in], f, RUN_FORMAT, buffer_items, io_stats)
+                merged_paths.append(path)
+            paths = merged_paths
+            passes += 1
+
+        out = _open_output(output_path, output_format != "text")
+        try:
+            _merge_files(paths, out, output_format, buffer_items, io_stats)
+        finally:
+            _close_stream(out)
+        passes += 1
+
+    if stats is not None:
+        stats.update({"runs": runs, "passes": passes, **io_stats})
+    return total
+
+def run_interactive():
+    print('Лабораторная N°1')
+    print('Ротару Ксения Алексеевна. Гр.4354\n\n')
+
+    n = int(input('Введите кол-во элементов в массиве: '))
+    A = []
+    print('Введите элементы массива через enter:')
+    for i in range(n):
+        A.append(int(input(f'{i}: ')))
+
+    trace = StdoutSink()
+    print('\nОтсортированный массив выбором:', Selection_Sort(A.copy(), n, trace))
+    print('\nОтсортированный массив вставками:', Insertion_Sort(A.copy(), n, trace))
+    print('\nОтсортированный массив слиянием:', Merge_Sort(A.copy(), n, trace))
+    print('\nОтсортированный массив кучей:', Heap_Sort(A.copy(), n, trace))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Лабораторная N°1: сортировки")
+    parser.add_argument("--input", "-i", help="файл с массивом ('-' для stdin); без него - интерактивный ввод")
+    parser.add_argument("--format", "-f", choices=["text", *BINARY_FORMATS], default="text")
+    parser.add_argument("--mmap", action="store_true", help="читать двоичный файл через mmap")
+    parser.add_argument("--sort", "-s", choices=list(SORTS), default="hybrid")
+    parser.add_argument("--output", "-o", help="куда записать отсортированный массив ('-' для stdout)")
+    parser.add_argument("--output-format", choices=["text", *BINARY_FORMATS], default=None)
+    parser.add_argument("--trace", action="store_true", help="печатать шаги сортировки")
+    parser.add_argument("--external", action="store_true",
+                        help="внешняя сортировка: серии во временных файлах и k-путевое слияние")
+    parser.add_argument("--memory", type=int, default=EXTERNAL_MEMORY >> 20,
+                        help="бюджет памяти внешней сортировки, МБ")
+    parser.add_argument("--fan-in", type=int, default=EXTERNAL_FAN_IN,
+                        help="сколько серий сливается за один проход")
+    parser.add_argument("--tmp-dir", help="каталог для временных файлов внешней сортировки")
+    parser.add_argument("--benchmark", choices=["insertion", "merge", "heap", "hybrid", "parallel"])
+    parser.add_argument("-n", type=int, default=None,
+                        help="размер массива для бенчмарка (по умолчанию свой для каждого бенчмарка)")
+    args = parser.parse_args(argv)
+    size = {} if args.n is None else {"n": args.n}
+
+    if args.benchmark == "insertion":
+        print_benchmark(benchmark_insertion_sorts(**size))
+        return 0
+    if args.benchmark == "merge":
+        print_benchmark(benchmark_merge_sorts(**size))
+        return 0
+    if args.benchmark == "heap":
+        print_benchmark(benchmark_heap_sorts(**size))
+        return 0
+    if args.benchmark == "parallel":
+        print_parallel(benchmark_parallel(**size))
+        return 0
+    if args.benchmark == "hybrid":
+        print_benchmark(benchmark_hybrid(**size))
+        return 0
+
+    if args.input is None:
+        if args.external:
+            parser.error("для --external нужен --input")
+        run_interactive()
+        return 0
+
+    if args.external:
+        if args.output is None:
+            parser.error("для --external нужен --output")
+        stats = {}
+        started = time.perf_counter()
+        count = External_Sort(args.input, args.output, args.format, args.output_format, args.memory << 20,
+                              args.fan_in, SORTS[args.sort], args.tmp_dir, stats)
+        elapsed = time.perf_counter() - started
+        counters = ", ".join(f"{COUNTER_LABELS[key]}: {value}" for key, value in stats.items())
+        print(f"Элементов: {count}, внешняя сортировка: {elapsed:.2f} с; {counters}", file=sys.stderr)
+        return 0
+
+    started = time.perf_counter()
+    values = load_array(args.input, args.format, args.mmap)
+    loaded = time.perf_counter() - started
+
+    stats = {}
+    started = time.perf_counter()
+    SORTS[args.sort](values, len(values), StdoutSink(sys.stderr) if args.trace else None, stats)
+    sorted_in = time.perf_counter() - started
+
+    if args.output is not None:
+        save_array(values, args.output, args.output_format or args.format)
+
+    counters = ", ".join(f"{COUNTER_LABELS[key]}: {value}" for key, value in stats.items())
+    print(f"Элементов: {len(values)}, загрузка: {loaded:.2f} с, сортировка: {sorted_in:.2f} с; {counters}",
+          file=sys.stderr)
+    return 0
 
-print('\nОтсортированный массив выбором:', Selection_Sort(A_copy1, n))
-print('\nОтсортированный массив вставками:', Insertion_Sort(A_copy2, n))
-print('\nОтсортированный массив слиянием:', Merge_Sort(A_copy3, n))
-print('\nОтсортированный массив кучей:', Heap_Sort(A_copy4, n))
+if __name__ == "__main__":
+    sys.exit(main())
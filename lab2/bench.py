@@ -0,0 +1,674 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import partial
+
+from lab2 import BST, AVL, RB, BTree, Color, MappedTree, PersistentAVL
+
+
+class DictNode:
+    def __init__(self, key):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1
+        self.height = 1
+        self.color = Color.BLACK
+
+    def __str__(self) -> str:
+        return str(self.key) if self.key is not None else "NIL"
+
+
+class DictBST(BST):
+    _node_class = DictNode
+
+
+class DictAVL(AVL):
+    _node_class = DictNode
+
+
+class DictRB(RB):
+    _node_class = DictNode
+
+
+NODE_LAYOUTS = [
+    ("BST", DictBST, BST),
+    ("AVL", DictAVL, AVL),
+    ("RB", DictRB, RB),
+]
+
+
+def bytes_per_node(tree_cls, keys):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = tree_cls()
+    for key in keys:
+        tree.insert(key)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(keys)
+
+
+def ops_per_second(tree_cls, keys):
+    tree = tree_cls()
+
+    started = time.perf_counter()
+    for key in keys:
+        tree.insert(key)
+    insert_rate = len(keys) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for key in keys:
+        tree.find(key)
+    find_rate = len(keys) / (time.perf_counter() - started)
+
+    return insert_rate, find_rate
+
+
+def benchmark_node_layout(n=40000, seed=0):
+    keys = list(range(n))
+    random.Random(seed).shuffle(keys)
+
+    results = []
+    for name, before_cls, after_cls in NODE_LAYOUTS:
+        row = {"tree": name}
+        for label, tree_cls in (("before", before_cls), ("after", after_cls)):
+            insert_rate, find_rate = ops_per_second(tree_cls, keys)
+            row[label] = {
+                "bytes_per_node": bytes_per_node(tree_cls, keys),
+                "insert_ops": insert_rate,
+                "find_ops": find_rate,
+            }
+        results.append(row)
+
+    return results
+
+
+def print_node_layout(results):
+    print(f"{'Дерево':<6} {'Узлы':<8} {'Байт/узел':>10} {'insert/с':>12} {'find/с':>12}")
+    for row in results:
+        for label in ("before", "after"):
+            stats = row[label]
+            layout = "__dict__" if label == "before" else "__slots__"
+            print(f"{row['tree']:<6} {layout:<8} {stats['bytes_per_node']:>10.1f} "
+                  f"{stats['insert_ops']:>12.0f} {stats['find_ops']:>12.0f}")
+
+
+def insert_loop(tree, keys):
+    inserted = 0
+    for key in keys:
+        if tree.insert(key) is not None:
+            inserted += 1
+    return inserted
+
+
+def benchmark_insert_many(n=40000, seed=0):
+    rng = random.Random(seed)
+    keys = rng.sample(range(n * 4), n)
+    half = n // 2
+    tail = n // 64
+
+    results = []
+    for tree_cls in (BST, AVL, RB):
+        for scenario, preload, batch in (("empty", [], keys), ("half", keys[:half], keys[half:]),
+                                         ("tail", keys[:n - tail], keys[n - tail:])):
+            row = {"tree": tree_cls.__name__, "scenario": scenario}
+            for label, load in (("loop", insert_loop), ("insert_many", tree_cls.insert_many)):
+                tree = tree_cls()
+                insert_loop(tree, preload)
+                gc.collect()
+                started = time.perf_counter()
+                load(tree, batch)
+                row[label] = len(batch) / (time.perf_counter() - started)
+            results.append(row)
+
+    return results
+
+
+def print_insert_many(results):
+    print(f"{'Дерево':<6} {'Сценарий':<8} {'insert/с':>12} {'insert_many/с':>14} {'Ускорение':>10}")
+    for row in results:
+        print(f"{row['tree']:<6} {row['scenario']:<8} {row['loop']:>12.0f} "
+              f"{row['insert_many']:>14.0f} {row['insert_many'] / row['loop']:>9.1f}x")
+
+
+def append_with_hint(tree, keys):
+    hint = None
+    for key in keys:
+        hint = tree.insert(key, hint) or hint
+    return len(keys)
+
+
+def local_walk(n, count, seed=0, spread=16):
+    rng = random.Random(seed)
+    position = n // 2
+    walk = []
+    for _ in range(count):
+        position = min(n - 1, max(0, position + rng.randrange(-spread, spread + 1)))
+        walk.append(position)
+    return walk
+
+
+def benchmark_finger(n=40000, seed=0):
+    keys = list(range(n))
+    random.Random(seed).shuffle(keys)
+    walk = local_walk(n, n, seed)
+
+    results = []
+    for tree_cls in (AVL, RB):
+        row = {"tree": tree_cls.__name__, "scenario": "append"}
+        for label, finger, load in (("root", False, insert_loop), ("finger", True, insert_loop),
+                                    ("hint", False, append_with_hint)):
+            tree = tree_cls(finger=finger)
+            gc.collect()
+            started = time.perf_counter()
+            load(tree, range(n))
+            row[label] = n / (time.perf_counter() - started)
+        results.append(row)
+
+    for tree_cls in (BST, AVL, RB):
+        row = {"tree": tree_cls.__name__, "scenario": "local"}
+        for label, finger in (("root", False), ("finger", True)):
+            tree = tree_cls(finger=finger)
+            insert_loop(tree, keys)
+            gc.collect()
+            started = time.perf_counter()
+            _count_calls(tree.find, walk)
+            row[label] = len(walk) / (time.perf_counter() - started)
+        results.append(row)
+
+    return results
+
+
+def print_finger(results):
+    print(f"{'Дерево':<6} {'Сценарий':<8} {'от корня/с':>12} {'finger/с':>12} {'hint/с':>12} {'Ускорение':>10}")
+    for row in results:
+        hint = f"{row['hint']:>12.0f}" if "hint" in row else f"{'-':>12}"
+        best = max(row["finger"], row.get("hint", 0))
+        print(f"{row['tree']:<6} {row['scenario']:<8} {row['root']:>12.0f} {row['finger']:>12.0f} "
+              f"{hint} {best / row['root']:>9.1f}x")
+
+
+def _seconds(action):
+    gc.collect()
+    started = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - started
+
+
+def benchmark_reload(n=200000, seed=0, lookups=20000):
+    keys = random.Random(seed).sample(range(n * 10), n)
+    probes = random.Random(seed + 1).sample(keys, min(lookups, n))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for tree_cls in (BST, AVL, RB):
+            path = os.path.join(directory, tree_cls.__name__ + ".tree")
+            tree = tree_cls()
+            _, insert_seconds = _seconds(lambda: insert_loop(tree, keys))
+            tree.save(path)
+
+            loaded, load_seconds = _seconds(lambda: tree_cls.load(path))
+            mapped, map_seconds = _seconds(lambda: MappedTree(path))
+            _, tree_find = _seconds(lambda: _count_calls(loaded.find, probes))
+            _, mapped_find = _seconds(lambda: _count_calls(mapped.find, probes))
+            mapped.close()
+
+            results.append({
+                "tree": tree_cls.__name__,
+                "n": n,
+                "bytes_per_node": os.path.getsize(path) / n,
+                "insert": insert_seconds,
+                "load": load_seconds,
+                "mmap": map_seconds,
+                "tree_find_ops": len(probes) / tree_find,
+                "mmap_find_ops": len(probes) / mapped_find,
+            })
+
+    return results
+
+
+def print_reload(results):
+    print(f"{'Дерево':<6} {'Байт/узел':>10} {'insert, с':>10} {'load, с':>9} {'Ускорение':>10} "
+          f"{'mmap, с':>9} {'find/с':>10} {'mmap find/с':>12}")
+    for row in results:
+        print(f"{row['tree']:<6} {row['bytes_per_node']:>10.2f} {row['insert']:>10.3f} {row['load']:>9.3f} "
+              f"{row['insert'] / row['load']:>9.1f}x {row['mmap']:>9.5f} "
+              f"{row['tree_find_ops']:>10.0f} {row['mmap_find_ops']:>12.0f}")
+
+
+DISTRIBUTIONS = ("uniform", "sorted", "reverse", "zipf", "clustered")
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+BST_DEGENERATE_LIMIT = 20000
+
+
+def make_keys(distribution, n, seed=0):
+    rng = random.Random(seed)
+
+    if distribution == "uniform":
+        return rng.sample(range(n * 10), n)
+    if distribution == "sorted":
+        return list(range(n))
+    if distribution == "reverse":
+        return list(range(n, 0, -1))
+    if distribution == "zipf":
+        weights = [1 / (rank + 1) ** 1.1 for rank in range(n)]
+        return rng.choices(range(n), weights=weights, k=n)
+    if distribution == "clustered":
+        centers = rng.sample(range(n * 100), n // 1000 + 1)
+        return [rng.choice(centers) + rng.randrange(-500, 500) for _ in range(n)]
+
+    raise ValueError(f"Неизвестное распределение ключей: {distribution}")
+
+
+def _timed(action):
+    gc.collect()
+    started = time.perf_counter()
+    count = action()
+    return count, time.perf_counter() - started
+
+
+def _count_calls(method, keys):
+    for key in keys:
+        method(key)
+    return len(keys)
+
+
+def _record(results, tree_cls, distribution, n, op, count, seconds):
+    results.append({
+        "tree": tree_cls.__name__,
+        "distribution": distribution,
+        "n": n,
+        "op": op,
+        "count": count,
+        "seconds": seconds,
+        "ops_per_sec": count / seconds if seconds > 0 else float("inf"),
+    })
+
+
+def benchmark_operations(tree_cls, distribution, n, seed=0):
+    keys = make_keys(distribution, n, seed)
+    lookups = keys[:]
+    random.Random(seed + 1).shuffle(lookups)
+
+    results = []
+    tree = tree_cls()
+
+    count, seconds = _timed(lambda: _count_calls(tree.insert, keys))
+    _record(results, tree_cls, distribution, n, "insert", count, seconds)
+
+    count, seconds = _timed(lambda: _count_calls(tree.find, lookups))
+    _record(results, tree_cls, distribution, n, "find", count, seconds)
+
+    for op in ("inorder", "preorder", "postorder", "levelorder"):
+        traversal = getattr(tree, op)
+        count, seconds = _timed(lambda: len(traversal()))
+        _record(results, tree_cls, distribution, n, op, count, seconds)
+
+    count, seconds = _timed(lambda: _count_calls(tree.delete, lookups))
+    _record(results, tree_cls, distribution, n, "delete", count, seconds)
+
+    return results
+
+
+def _best_of(runs):
+    best = {}
+    for run in runs:
+        for row in run:
+            key = _result_key(row)
+            if key not in best or row["seconds"] < best[key]["seconds"]:
+                best[key] = row
+    return list(best.values())
+
+
+def run_suite(trees=("BST", "AVL", "RB"), distributions=DISTRIBUTIONS, sizes=DEFAULT_SIZES,
+              seed=0, repeat=1):
+    tree_types = {"BST": BST, "AVL": AVL, "RB": RB, "BTree": BTree}
+    results = []
+    skipped = []
+
+    for n in sizes:
+        for distribution in distributions:
+            for name in trees:
+                if name == "BST" and distribution in ("sorted", "reverse") and n > BST_DEGENERATE_LIMIT:
+                    skipped.append({"tree": name, "distribution": distribution, "n": n})
+                    continue
+                print(f"{name:<4} {distribution:<10} n={n}", file=sys.stderr, flush=True)
+                runs = [benchmark_operations(tree_types[name], distribution, n, seed) for _ in range(repeat)]
+                results.extend(_best_of(runs))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": seed,
+            "repeat": repeat,
+            "sizes": list(sizes),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+BTREE_ORDERS = (16, 64, 256)
+
+
+def benchmark_btree(n=100000, seed=0, orders=BTREE_ORDERS, distributions=("uniform", "sorted")):
+    contenders = [("AVL", AVL), ("RB", RB)] + [(f"BTree-{order}", partial(BTree, order)) for order in orders]
+
+    results = []
+    for distribution in distributions:
+        keys = make_keys(distribution, n, seed)
+        lookups = keys[:]
+        random.Random(seed + 1).shuffle(lookups)
+
+        for name, factory in contenders:
+            tree = factory()
+            row = {"tree": name, "distribution": distribution, "n": n}
+            for op, action in (("insert", lambda: _count_calls(tree.insert, keys)),
+                               ("find", lambda: _count_calls(tree.find, lookups)),
+                               ("inorder", lambda: len(tree.inorder())),
+                               ("delete", lambda: _count_calls(tree.delete, lookups))):
+                count, seconds = _timed(action)
+                row[op] = count / seconds
+            results.append(row)
+
+    return results
+
+
+def print_btree(results):
+    print(f"{'Дерево':<11} {'Ключи':<8} {'insert/с':>11} {'find/с':>11} {'inorder/с':>11} {'delete/с':>11}")
+    for row in results:
+        print(f"{row['tree']:<11} {row['distribution']:<8} {row['insert']:>11.0f} {row['find']:>11.0f} "
+              f"{row['inorder']:>11.0f} {row['delete']:>11.0f}")
+
+
+def naive_union(tree, other):
+    for key in other.iter_inorder():
+        tree.insert(key)
+    return tree
+
+
+def naive_intersection(tree, other):
+    result = type(tree)()
+    for key in other.iter_inorder():
+        if not tree._is_nil(tree.find(key)):
+            result.insert(key)
+    return result
+
+
+def naive_difference(tree, other):
+    for key in other.iter_inorder():
+        tree.delete(key)
+    return tree
+
+
+SET_OPERATIONS = (
+    ("union", naive_union, "union"),
+    ("intersection", naive_intersection, "intersection"),
+    ("difference", naive_difference, "difference"),
+)
+
+
+def naive_split(tree, key):
+    right = type(tree)()
+    for current in list(tree.irange(key)):
+        right.insert(current)
+        tree.delete(current)
+    return tree, right
+
+
+def benchmark_split_join(tree_cls, keys):
+    middle = keys[len(keys) // 2]
+    row = {"tree": tree_cls.__name__, "op": "split", "n": len(keys), "m": len(keys) - len(keys) // 2}
+    tree = tree_cls.from_sorted(keys)
+    _, row["naive"] = _seconds(lambda: naive_split(tree, middle))
+    tree = tree_cls.from_sorted(keys)
+    _, row["join"] = _seconds(lambda: tree.split(middle))
+
+    low, high = keys[:len(keys) // 2], keys[len(keys) // 2:]
+    concat = {"tree": tree_cls.__name__, "op": "join", "n": len(low), "m": len(high)}
+    tree, other = tree_cls.from_sorted(low), tree_cls.from_sorted(high)
+    _, concat["naive"] = _seconds(lambda: naive_union(tree, other))
+    tree, other = tree_cls.from_sorted(low), tree_cls.from_sorted(high)
+    _, concat["join"] = _seconds(lambda: tree.join(other))
+    return [row, concat]
+
+
+def benchmark_setops(n=100000, sizes=(100, 1000, 10000, 100000), seed=0):
+    rng = random.Random(seed)
+    base_keys = sorted(rng.sample(range(n * 10), n))
+
+    results = []
+    for tree_cls in (AVL, RB):
+        results.extend(benchmark_split_join(tree_cls, base_keys))
+        for m in sizes:
+            other_keys = sorted(rng.sample(range(n * 10), m))
+            for op, naive, method in SET_OPERATIONS:
+                row = {"tree": tree_cls.__name__, "op": op, "n": n, "m": m}
+                for label in ("naive", "join"):
+                    tree = tree_cls.from_sorted(base_keys)
+                    other = tree_cls.from_sorted(other_keys)
+                    if label == "naive":
+                        _, row[label] = _seconds(lambda: naive(tree, other))
+                    else:
+                        _, row[label] = _seconds(lambda: getattr(tree, method)(other))
+                results.append(row)
+
+    return results
+
+
+def print_setops(results):
+    print(f"{'Дерево':<6} {'Операция':<13} {'n':>8} {'m':>8} {'Цикл, с':>10} {'Метод, с':>10} {'Ускорение':>10}")
+    for row in results:
+        print(f"{row['tree']:<6} {row['op']:<13} {row['n']:>8} {row['m']:>8} {row['naive']:>10.4f} "
+              f"{row['join']:>10.4f} {row['naive'] / row['join']:>9.1f}x")
+
+
+class LockedTree:
+    def __init__(self, tree):
+        self.tree = tree
+        self.lock = threading.Lock()
+
+    def find(self, key):
+        with self.lock:
+            return self.tree.find(key)
+
+    def insert(self, key):
+        with self.lock:
+            return self.tree.insert(key)
+
+    def delete(self, key):
+        with self.lock:
+            return self.tree.delete(key)
+
+
+def _reader(make_view, probes, stop, counts, index, batch=256):
+    done = 0
+    while not stop.is_set():
+        view = make_view()
+        for key in probes[done % len(probes):done % len(probes) + batch]:
+            view.find(key)
+        done += batch
+    counts[index] = done
+
+
+def _writer(tree, keys, stop, counts, index):
+    done = 0
+    while not stop.is_set():
+        for key in keys:
+            tree.insert(key)
+        for key in keys:
+            tree.delete(key)
+        done += 2 * len(keys)
+    counts[index] = done
+
+
+def benchmark_concurrent_reads(n=100000, readers=(1, 2, 4), duration=1.0, seed=0):
+    rng = random.Random(seed)
+    keys = sorted(rng.sample(range(0, n * 20, 2), n))
+    probes = rng.sample(keys, min(n, 65536))
+    updates = rng.sample(range(1, n * 20, 2), 256)
+
+    variants = [
+        ("AVL + lock", lambda: LockedTree(AVL.from_sorted(keys)), lambda tree: lambda: tree),
+        ("PersistentAVL", lambda: PersistentAVL.from_sorted(keys), lambda tree: tree.snapshot),
+    ]
+
+    results = []
+    for name, build, reader_view in variants:
+        for count in readers:
+            tree = build()
+            make_view = reader_view(tree)
+            stop = threading.Event()
+            counts = [0] * (count + 1)
+            threads = [threading.Thread(target=_writer, args=(tree, updates, stop, counts, 0))]
+            threads += [threading.Thread(target=_reader, args=(make_view, probes, stop, counts, i + 1))
+                        for i in range(count)]
+
+            gc.collect()
+            for thread in threads:
+                thread.start()
+            time.sleep(duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            results.append({
+                "tree": name,
+                "readers": count,
+                "reads": sum(counts[1:]) / duration,
+                "writes": counts[0] / duration,
+            })
+
+    return results
+
+
+def print_concurrent_reads(results):
+    print(f"{'Дерево':<14} {'Читателей':>9} {'Чтений/с':>12} {'Записей/с':>12}")
+    for row in results:
+        print(f"{row['tree']:<14} {row['readers']:>9} {row['reads']:>12.0f} {row['writes']:>12.0f}")
+
+
+def _result_key(row):
+    return row["tree"], row["distribution"], row["n"], row["op"]
+
+
+def compare_results(baseline, current, threshold=0.10):
+    baseline_rows = {_result_key(row): row for row in baseline["results"]}
+
+    comparison = []
+    for row in current["results"]:
+        before = baseline_rows.get(_result_key(row))
+        if before is None:
+            continue
+        ratio = row["ops_per_sec"] / before["ops_per_sec"]
+        comparison.append({
+            "tree": row["tree"],
+            "distribution": row["distribution"],
+            "n": row["n"],
+            "op": row["op"],
+            "baseline": before["ops_per_sec"],
+            "current": row["ops_per_sec"],
+            "ratio": ratio,
+            "regression": ratio < 1 - threshold,
+        })
+
+    return comparison
+
+
+def print_comparison(comparison):
+    print(f"{'Дерево':<6} {'Ключи':<10} {'n':>8} {'Операция':<11} {'Было/с':>12} {'Стало/с':>12} {'Изм.':>8}")
+    for row in comparison:
+        mark = "  РЕГРЕССИЯ" if row["regression"] else ""
+        print(f"{row['tree']:<6} {row['distribution']:<10} {row['n']:>8} {row['op']:<11} "
+              f"{row['baseline']:>12.0f} {row['current']:>12.0f} {row['ratio'] - 1:>+7.1%}{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки деревьев BST/AVL/RB")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("nodes", help="память и скорость представления узлов")
+    commands.add_parser("insert-many", help="пакетная вставка против цикла insert")
+    commands.add_parser("finger", help="поиск от последнего узла и вставка с подсказкой")
+    commands.add_parser("reload", help="загрузка из двоичного файла против повторной вставки")
+    commands.add_parser("btree", help="B-дерево против AVL и RB")
+    commands.add_parser("setops", help="объединение, пересечение и разность через join")
+    concurrent_parser = commands.add_parser("concurrent", help="чтение из потоков при параллельной записи")
+    concurrent_parser.add_argument("--readers", nargs="+", type=int, default=[1, 2, 4])
+    concurrent_parser.add_argument("--duration", type=float, default=1.0)
+
+    suite_parser = commands.add_parser("suite", help="пропускная способность операций, JSON")
+    suite_parser.add_argument("--trees", nargs="+", default=["BST", "AVL", "RB", "BTree"])
+    suite_parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS))
+    suite_parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.add_argument("--repeat", type=int, default=1)
+    suite_parser.add_argument("--output", "-o", default="-")
+
+    compare_parser = commands.add_parser("compare", help="сравнение с сохранённым базовым JSON")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "suite":
+        report = run_suite(args.trees, args.distributions, args.sizes, args.seed, args.repeat)
+        if args.output == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        comparison = compare_results(baseline, current, args.threshold)
+        print_comparison(comparison)
+        regressions = sum(row["regression"] for row in comparison)
+        print(f"\nРегрессий: {regressions} из {len(comparison)}")
+        return 1 if regressions else 0
+
+    if args.command in (None, "nodes"):
+        print("=== ПРЕДСТАВЛЕНИЕ УЗЛОВ ===")
+        print_node_layout(benchmark_node_layout())
+        print()
+    if args.command in (None, "insert-many"):
+        print("=== ПАКЕТНАЯ ВСТАВКА ===")
+        print_insert_many(benchmark_insert_many())
+    if args.command == "finger":
+        print("=== FINGER-ПОИСК И ВСТАВКА С ПОДСКАЗКОЙ ===")
+        print_finger(benchmark_finger())
+    if args.command == "reload":
+        print("=== СОХРАНЕНИЕ И ЗАГРУЗКА ===")
+        print_reload(benchmark_reload())
+    if args.command == "btree":
+        print("=== B-ДЕРЕВО ПРОТИВ AVL И RB ===")
+        print_btree(benchmark_btree())
+    if args.command == "setops":
+        print("=== ОПЕРАЦИИ НАД МНОЖЕСТВАМИ ===")
+        print_setops(benchmark_setops())
+    if args.command == "concurrent":
+        print("=== ЧТЕНИЕ ИЗ ПОТОКОВ ПРИ ПАРАЛЛЕЛЬНОЙ ЗАПИСИ ===")
+        print_concurrent_reads(benchmark_concurrent_reads(readers=args.readers, duration=args.duration))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,17 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+from itertools import islice
+import io
+import mmap
 import random
 import math
+import struct
+import sys
+import threading
+import time
 import matplotlib.pyplot as plt
 
 
@@ -9,82 +20,565 @@ class Color(Enum):
     RED = 1
 
 
+BLACK = Color.BLACK
+RED = Color.RED
+
+
 class Node:
+    __slots__ = ("key", "left", "right", "parent", "size")
+
     def __init__(self, key):
         self.key = key
         self.left = None
         self.right = None
         self.parent = None
-        self.height = 1
-        self.color = Color.BLACK
+        self.size = 1
 
     def __str__(self) -> str:
         return str(self.key) if self.key is not None else "NIL"
 
 
-class BST:
+class AVLNode(Node):
+    __slots__ = ("height",)
+
+    def __init__(self, key):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1
+        self.height = 1
+
+
+class RBNode(Node):
+    __slots__ = ("color",)
+
+    def __init__(self, key):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1
+        self.color = Color.BLACK
+
+
+class TreeStats:
+    FIELDS = ("comparisons", "path_length", "rotations", "recolors")
+
     def __init__(self):
-        self.NIL = Node(None)
-        self.NIL.left = self.NIL
-        self.NIL.right = self.NIL
-        self.NIL.parent = self.NIL
-        self.NIL.height = 0
-        self.NIL.color = Color.BLACK
-        self.root = self.NIL
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+        self.by_op = {}
+        self.last = None
+        self._current = None
+
+    def begin(self, op):
+        self.last = dict.fromkeys(self.FIELDS, 0)
+        self.last["op"] = op
+
+        per_op = self.by_op.get(op)
+        if per_op is None:
+            per_op = self.by_op[op] = dict.fromkeys(self.FIELDS, 0)
+            per_op["count"] = 0
+        per_op["count"] += 1
+        self._current = per_op
+
+    def add(self, field, amount=1):
+        if self.last is None:
+            self.begin("other")
+        self.last[field] += amount
+        self._current[field] += amount
+        self.totals[field] += amount
+
+    def summary(self):
+        return {
+            "totals": dict(self.totals),
+            "by_op": {op: dict(counters) for op, counters in self.by_op.items()},
+            "last": dict(self.last) if self.last is not None else None,
+        }
+
+
+class TreeCursor:
+    def __init__(self, tree, node):
+        self.tree = tree
+        self.node = node
+
+    @property
+    def valid(self):
+        return not self.tree._is_nil(self.node)
+
+    @property
+    def key(self):
+        return self.node.key
+
+    def next(self):
+        if self.valid:
+            self.node = self.tree._next_node(self.node)
+        return self.key
+
+    def prev(self):
+        if self.valid:
+            self.node = self.tree._prev_node(self.node)
+        return self.key
+
+    def seek(self, key):
+        self.node = self.tree._ceiling_node(key, False)
+        return self.key
+
+    def seek_last(self, key=None):
+        if key is None:
+            self.node = self.tree._maximum(self.tree.root)
+        else:
+            self.node = self.tree._floor_node(key, False)
+        return self.key
 
-    def _is_nil(self, node):
-        return node is self.NIL
 
-    def __str__(self, node=None, level=0, prefix="root: ") -> str:
-        if node is None:
-            node = self.root
-            if self._is_nil(node):
-                return "Empty tree"
+TREE_MAGIC = b"TREE"
+TREE_HEADER = struct.Struct("<4sBBxxQ")
+TREE_FORMAT_VERSION = 1
+STR_MAX_NODES = 200
+BTREE_ORDER = 64
 
-        res = "   " * level + prefix + str(node)
 
-        if self._is_nil(node):
-            res += "\n"
-            return res
+def _render_tree(out, root, children, label, max_depth=None, max_nodes=None, total=None, stub=None):
+    written = 0
+    stack = [(root, 0, "root: ")]
+    while stack:
+        node, level, prefix = stack.pop()
+        indent = "   " * level
 
-        res += "\n"
-        res += self.__str__(node.left, level + 1, "L: ")
-        res += self.__str__(node.right, level + 1, "R: ")
+        if max_nodes is not None and written >= max_nodes and node is not stub:
+            remaining = total - written if total is not None else None
+            out.write(indent + (f"... (+{remaining})\n" if remaining else "...\n"))
+            break
 
-        return res
+        out.write(indent + prefix + label(node) + "\n")
+        if node is stub:
+            continue
+        written += 1
 
-    def insert(self, key):
-        if not self._is_nil(self.find(key)):
-            return None
+        branches = children(node)
+        if not branches:
+            continue
+        if max_depth is not None and level >= max_depth:
+            if any(child is not stub for child, _ in branches):
+                out.write("   " * (level + 1) + "...\n")
+            continue
+        for child, side in reversed(branches):
+            stack.append((child, level + 1, side))
 
-        x = Node(key)
-        x.left = self.NIL
-        x.right = self.NIL
-        x.parent = self.NIL
+    return written
 
-        if self._is_nil(self.root):
-            self.root = x
-            return x
 
-        current = self.root
-        parent = self.NIL
+class BST:
+    _node_class = Node
+    _sorted_batches = False
+    _kind = 0
+    _setop_loop_ratios = {"union": 64, "intersection": 4, "difference": 8}
+    _setop_changes = 0
+
+    def __init__(self, order_stats=True, finger=False):
+        self.NIL = self._shared_nil()
+        self.root = self.NIL
+        self.order_stats = order_stats
+        self.stats = None
+        self.finger = finger
+        self._tracking = finger
+        self._finger = self.NIL
+        self._min_node = self.NIL
+        self._max_node = self.NIL
+
+    @classmethod
+    def _shared_nil(cls):
+        nil = cls.__dict__.get("_nil")
+        if nil is None:
+            nil = cls._node_class(None)
+            nil.left = nil
+            nil.right = nil
+            nil.parent = nil
+            nil.size = 0
+            cls._nil = nil
+        return nil
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        old_nil, nil = self.NIL, self._shared_nil()
+        if old_nil is nil:
+            return
+
+        self.NIL = nil
+        for name in ("root", "_finger", "_min_node", "_max_node"):
+            if getattr(self, name) is old_nil:
+                setattr(self, name, nil)
+        if self.root is not nil:
+            self.root.parent = nil
+
+        stack = [self.root] if self.root is not nil else []
+        while stack:
+            node = stack.pop()
+            if node.left is old_nil:
+                node.left = nil
+            else:
+                stack.append(node.left)
+            if node.right is old_nil:
+                node.right = nil
+            else:
+                stack.append(node.right)
 
-        while not self._is_nil(current):
+    def enable_stats(self):
+        self.stats = TreeStats()
+        return self.stats
+
+    def disable_stats(self):
+        stats = self.stats
+        self.stats = None
+        return stats
+
+    def _descend_counted(self, key, current, op):
+        nil = self.NIL
+        parent = nil
+        visited = comparisons = 0
+
+        while current is not nil:
             parent = current
+            visited += 1
             if key < current.key:
+                comparisons += 1
                 current = current.left
-            else:
+            elif key > current.key:
+                comparisons += 2
                 current = current.right
+            else:
+                comparisons += 2
+                break
+
+        self.stats.begin(op)
+        self.stats.add("comparisons", comparisons)
+        self.stats.add("path_length", visited)
+        return parent, current
+
+    def _is_nil(self, node):
+        return node is self.NIL
+
+    def __str__(self) -> str:
+        if self._is_nil(self.root):
+            return "Empty tree"
+
+        out = io.StringIO()
+        self.render(out, max_nodes=STR_MAX_NODES)
+        return out.getvalue()
+
+    def _annotation(self, node):
+        return ""
+
+    def render(self, out=None, max_depth=None, max_nodes=None, show_nil=False, annotate=False):
+        if out is None:
+            out = sys.stdout
+        if self._is_nil(self.root):
+            out.write("Empty tree\n")
+            return 0
+
+        def children(node):
+            return [(child, side) for child, side in ((node.left, "L: "), (node.right, "R: "))
+                    if show_nil or not self._is_nil(child)]
+
+        def label(node):
+            if annotate and not self._is_nil(node):
+                return str(node) + self._annotation(node)
+            return str(node)
+
+        total = len(self) if self.order_stats else None
+        return _render_tree(out, self.root, children, label, max_depth, max_nodes, total, self.NIL)
+
+    def _track_extremes(self):
+        self._tracking = True
+        self._reset_extremes()
+
+    def _reset_extremes(self):
+        nil = self.NIL
+        if self._tracking and self.root is not nil:
+            self._min_node = self._minimum(self.root)
+            self._max_node = self._maximum(self.root)
+        else:
+            self._min_node = self._max_node = nil
+
+    def _search_start(self, key, hint):
+        if not self._tracking:
+            self._track_extremes()
+        nil = self.NIL
+        if self._max_node is not nil and key > self._max_node.key:
+            return self._max_node
+        if self._min_node is not nil and key < self._min_node.key:
+            return self._min_node
+        if hint is None:
+            hint = self._finger
+        if hint is nil:
+            return self.root
+
+        node = hint
+        if key > node.key:
+            while node.parent is not nil:
+                parent = node.parent
+                if node is parent.left and not key > parent.key:
+                    return parent if key == parent.key else node
+                node = parent
+        elif key < node.key:
+            while node.parent is not nil:
+                parent = node.parent
+                if node is parent.right and not key < parent.key:
+                    return parent if key == parent.key else node
+                node = parent
+        return node
 
+    def insert(self, key, hint=None):
+        nil = self.NIL
+        parent = nil
+        if hint is None and not self.finger:
+            current = self.root
+        else:
+            current = self._search_start(key, hint)
+
+        if self.stats is not None:
+            parent, current = self._descend_counted(key, current, "insert")
+        else:
+            while current is not nil:
+                parent = current
+                if key < current.key:
+                    current = current.left
+                elif key > current.key:
+                    current = current.right
+                else:
+                    break
+
+        if current is not nil:
+            if self.finger:
+                self._finger = current
+            return None
+
+        x = self._node_class(key)
+        x.left = nil
+        x.right = nil
         x.parent = parent
-        if key < parent.key:
+
+        if parent is nil:
+            self.root = x
+        elif key < parent.key:
             parent.left = x
         else:
             parent.right = x
 
+        if self._tracking:
+            if self.finger:
+                self._finger = x
+            if self._min_node is nil or key < self._min_node.key:
+                self._min_node = x
+            if self._max_node is nil or key > self._max_node.key:
+                self._max_node = x
+
+        if self.order_stats:
+            while parent is not nil:
+                parent.size += 1
+                parent = parent.parent
+
         return x
 
-    def find(self, key):
+    def insert_many(self, keys):
+        if not self._sorted_batches:
+            if self._tracking or self.stats is not None:
+                inserted = 0
+                insert = self.insert
+                for key in keys:
+                    if insert(key) is not None:
+                        inserted += 1
+                return inserted
+            return self._insert_unsorted(keys)
+
+        batch = sorted(keys)
+        if not batch:
+            return 0
+
+        limit = len(batch) * len(batch).bit_length()
+        if not self.order_stats or self.root.size <= limit:
+            existing = []
+            for node in self._iter_inorder_nodes():
+                existing.append(node)
+                if len(existing) > limit:
+                    break
+            else:
+                return self._merge_rebuild(existing, batch)
+
+        inserted = 0
+        insert = self.insert
+        for key in batch:
+            if insert(key) is not None:
+                inserted += 1
+        return inserted
+
+    def _insert_unsorted(self, keys):
+        nil = self.NIL
+        node_class = self._node_class
+        order_stats = self.order_stats
+        inserted = 0
+        for key in keys:
+            parent = nil
+            current = self.root
+            while current is not nil:
+                parent = current
+                if key < current.key:
+                    current = current.left
+                elif key > current.key:
+                    current = current.right
+                else:
+                    break
+            if current is not nil:
+                continue
+
+            x = node_class(key)
+            x.left = nil
+            x.right = nil
+            x.parent = parent
+            if parent is nil:
+                self.root = x
+            elif key < parent.key:
+                parent.left = x
+            else:
+                parent.right = x
+
+            if order_stats:
+                while parent is not nil:
+                    parent.size += 1
+                    parent = parent.parent
+            inserted += 1
+        return inserted
+
+    def _merge_rebuild(self, existing, batch):
+        nodes = []
+        i = 0
+        for key in batch:
+            while i < len(existing) and existing[i].key < key:
+                nodes.append(existing[i])
+                i += 1
+            if i < len(existing) and existing[i].key == key:
+                continue
+            if nodes and not nodes[-1].key < key:
+                continue
+            nodes.append(self._node_class(key))
+        nodes.extend(existing[i:])
+
+        self._link_sorted(nodes)
+        return len(nodes) - len(existing)
+
+    @classmethod
+    def from_sorted(cls, keys, order_stats=True, finger=False):
+        tree = cls(order_stats, finger)
+        tree.bulk_load(keys)
+        return tree
+
+    def bulk_load(self, keys):
+        keys = list(keys)
+        if not all(a < b for a, b in zip(keys, islice(keys, 1, None))):
+            keys = sorted(set(keys))
+
+        self._link_sorted([self._node_class(key) for key in keys])
+        return self
+
+    def _link_sorted(self, nodes):
+        self._finger = self.NIL
+        if not nodes:
+            self.root = self._min_node = self._max_node = self.NIL
+            return
+
+        if self._tracking:
+            self._min_node = nodes[0]
+            self._max_node = nodes[-1]
+
+        max_depth = len(nodes).bit_length() - 1
+        self.root, _ = self._build_balanced(nodes, 0, len(nodes), 0, max_depth, self.NIL)
+
+    def _build_balanced(self, nodes, lo, hi, depth, max_depth, parent):
+        if lo >= hi:
+            return self.NIL, 0
+
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        node.parent = parent
+        node.left, left_height = self._build_balanced(nodes, lo, mid, depth + 1, max_depth, node)
+        node.right, right_height = self._build_balanced(nodes, mid + 1, hi, depth + 1, max_depth, node)
+
+        height = max(left_height, right_height) + 1
+        node.size = hi - lo
+        self._init_bulk_node(node, depth, height, max_depth)
+        return node, height
+
+    def _init_bulk_node(self, node, depth, height, max_depth):
+        pass
+
+    def save(self, path):
+        nodes = list(self._iter_preorder_nodes())
+        keys = array("q", [node.key for node in nodes])
+        with open(path, "wb") as f:
+            f.write(TREE_HEADER.pack(TREE_MAGIC, TREE_FORMAT_VERSION, self._kind, len(nodes)))
+            f.write(keys.tobytes())
+            f.write(self._dump_extra(nodes))
+
+    @classmethod
+    def load(cls, path, order_stats=True, finger=False):
+        with open(path, "rb") as f:
+            magic, version, kind, n = TREE_HEADER.unpack(f.read(TREE_HEADER.size))
+            if magic != TREE_MAGIC or version != TREE_FORMAT_VERSION:
+                raise ValueError(f"{path}: не файл дерева или неподдерживаемая версия формата")
+            if kind != cls._kind:
+                raise ValueError(f"{path}: дерево другого типа, ожидался {cls.__name__}")
+            keys = array("q")
+            keys.fromfile(f, n)
+            extra = f.read()
+
+        tree = cls(order_stats, finger)
+        tree._link_preorder(keys, extra)
+        return tree
+
+    def _dump_extra(self, nodes):
+        return b""
+
+    def _load_extra(self, nodes, extra):
+        pass
+
+    def _link_preorder(self, keys, extra):
+        nil = self.NIL
+        node_class = self._node_class
+        nodes = []
+        stack = []
+
+        for key in keys:
+            node = node_class(key)
+            node.left = nil
+            node.right = nil
+            parent = nil
+            while stack and stack[-1].key < key:
+                parent = stack.pop()
+            if parent is not nil:
+                parent.right = node
+            elif stack:
+                parent = stack[-1]
+                parent.left = node
+            node.parent = parent
+            stack.append(node)
+            nodes.append(node)
+
+        if self.order_stats:
+            for node in reversed(nodes):
+                node.size = node.left.size + node.right.size + 1
+        self._load_extra(nodes, extra)
+
+        self.root = nodes[0] if nodes else nil
+        self._finger = nil
+        self._reset_extremes()
+
+    def find(self, key, hint=None):
+        if hint is not None or self.finger:
+            return self._find_from(key, hint)
+        if self.stats is not None:
+            return self._find_counted(key, "find")
+
         current = self.root
 
         while not self._is_nil(current):
@@ -97,6 +591,55 @@ class BST:
 
         return self.NIL
 
+    def _find_from(self, key, hint):
+        nil = self.NIL
+        current = self._search_start(key, hint)
+        last = current
+
+        if self.stats is not None:
+            last, current = self._descend_counted(key, current, "find")
+        else:
+            while current is not nil:
+                last = current
+                if key < current.key:
+                    current = current.left
+                elif key > current.key:
+                    current = current.right
+                else:
+                    break
+
+        if self.finger:
+            self._finger = last
+        return current
+
+    def _forget(self, node):
+        if not self._tracking:
+            return
+        if node is self._finger:
+            self._finger = self.NIL
+        if node is self._min_node:
+            self._min_node = self._next_node(node)
+        if node is self._max_node:
+            self._max_node = self._prev_node(node)
+
+    def _locate(self, key, op):
+        if self.stats is not None:
+            return self._find_counted(key, op)
+
+        current = self.root
+        while not self._is_nil(current):
+            if key < current.key:
+                current = current.left
+            elif key > current.key:
+                current = current.right
+            else:
+                return current
+
+        return self.NIL
+
+    def _find_counted(self, key, op):
+        return self._descend_counted(key, self.root, op)[1]
+
     def _transplant(self, u, v):
         if self._is_nil(u.parent):
             self.root = v
@@ -128,10 +671,405 @@ class BST:
             return None
         return self._maximum(self.root).key
 
+    def _next_node(self, node):
+        if not self._is_nil(node.right):
+            return self._minimum(node.right)
+
+        parent = node.parent
+        while not self._is_nil(parent) and node is parent.right:
+            node = parent
+            parent = parent.parent
+        return parent
+
+    def _prev_node(self, node):
+        if not self._is_nil(node.left):
+            return self._maximum(node.left)
+
+        parent = node.parent
+        while not self._is_nil(parent) and node is parent.left:
+            node = parent
+            parent = parent.parent
+        return parent
+
+    def _ceiling_node(self, key, strict):
+        result = self.NIL
+        node = self.root
+        while not self._is_nil(node):
+            if key < node.key:
+                result = node
+                node = node.left
+            elif key > node.key or strict:
+                node = node.right
+            else:
+                return node
+        return result
+
+    def _floor_node(self, key, strict):
+        result = self.NIL
+        node = self.root
+        while not self._is_nil(node):
+            if key > node.key:
+                result = node
+                node = node.right
+            elif key < node.key or strict:
+                node = node.left
+            else:
+                return node
+        return result
+
+    def successor(self, key):
+        return self._ceiling_node(key, True).key
+
+    def predecessor(self, key):
+        return self._floor_node(key, True).key
+
+    def ceiling(self, key):
+        return self._ceiling_node(key, False).key
+
+    def floor(self, key):
+        return self._floor_node(key, False).key
+
+    def irange(self, lo=None, hi=None, reverse=False):
+        if reverse:
+            node = self._maximum(self.root) if hi is None else self._floor_node(hi, False)
+            while not self._is_nil(node) and (lo is None or not node.key < lo):
+                yield node.key
+                node = self._prev_node(node)
+        else:
+            node = self._minimum(self.root) if lo is None else self._ceiling_node(lo, False)
+            while not self._is_nil(node) and (hi is None or not node.key > hi):
+                yield node.key
+                node = self._next_node(node)
+
+    def cursor(self, key=None):
+        if key is None:
+            return TreeCursor(self, self._minimum(self.root))
+        return TreeCursor(self, self._ceiling_node(key, False))
+
+    def __len__(self):
+        if self.order_stats:
+            return self.root.size
+        return sum(1 for _ in self._iter_inorder_nodes())
+
+    def _count_before(self, key, inclusive):
+        if not self.order_stats:
+            result = 0
+            for current in self.iter_inorder():
+                if current > key or (current == key and not inclusive):
+                    break
+                result += 1
+            return result
+
+        result = 0
+        node = self.root
+        while not self._is_nil(node):
+            if key < node.key or (key == node.key and not inclusive):
+                node = node.left
+            else:
+                result += node.left.size + 1
+                node = node.right
+        return result
+
+    def rank(self, key):
+        return self._count_before(key, False)
+
+    def select(self, k):
+        if k < 0 or k >= len(self):
+            return None
+
+        if not self.order_stats:
+            return next(islice(self.iter_inorder(), k, None))
+
+        node = self.root
+        while True:
+            left_size = node.left.size
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return node.key
+            else:
+                k -= left_size + 1
+                node = node.right
+
+    def count_range(self, lo, hi):
+        if hi < lo:
+            return 0
+        return self._count_before(hi, True) - self._count_before(lo, False)
+
+    def median(self):
+        n = len(self)
+        if n == 0:
+            return None
+        return self.select((n - 1) // 2)
+
+    def _link(self, node, left, right):
+        node.left = left
+        node.right = right
+        if left is not self.NIL:
+            left.parent = node
+        if right is not self.NIL:
+            right.parent = node
+        node.size = left.size + right.size + 1
+        return node
+
+    def _rotate_left_subtree(self, x):
+        y = x.right
+        self._link(x, x.left, y.left)
+        return self._link(y, x, y.right)
+
+    def _rotate_right_subtree(self, y):
+        x = y.left
+        self._link(y, x.right, y.right)
+        return self._link(x, x.left, y)
+
+    def _root_rank(self, node):
+        return 0
+
+    def _child_rank(self, node, rank):
+        return 0
+
+    def _join(self, left, left_rank, node, right, right_rank):
+        return self._link(node, left, right), 0
+
+    def _split(self, node, rank, key):
+        nil = self.NIL
+        if node is nil:
+            return nil, 0, nil, nil, 0
+
+        left, right = node.left, node.right
+        child_rank = self._child_rank(node, rank)
+        if key == node.key:
+            return left, child_rank, node, right, child_rank
+        if key < node.key:
+            if left is nil:
+                return nil, 0, nil, node, rank
+            less, less_rank, found, greater, greater_rank = self._split(left, child_rank, key)
+            greater, greater_rank = self._join(greater, greater_rank, node, right, child_rank)
+        else:
+            if right is nil:
+                return node, rank, nil, nil, 0
+            less, less_rank, found, greater, greater_rank = self._split(right, child_rank, key)
+            less, less_rank = self._join(left, child_rank, node, less, less_rank)
+        return less, less_rank, found, greater, greater_rank
+
+    def _split_last(self, node, rank):
+        child_rank = self._child_rank(node, rank)
+        if node.right is self.NIL:
+            return node.left, child_rank, node
+        rest, rest_rank, last = self._split_last(node.right, child_rank)
+        rest, rest_rank = self._join(node.left, child_rank, node, rest, rest_rank)
+        return rest, rest_rank, last
+
+    def _join2(self, left, left_rank, right, right_rank):
+        if left is self.NIL:
+            return right, right_rank
+        rest, rest_rank, last = self._split_last(left, left_rank)
+        return self._join(rest, rest_rank, last, right, right_rank)
+
+    def _union(self, a, a_rank, nodes, keys, lo, hi):
+        nil = self.NIL
+        key = a.key
+        mid = bisect_left(keys, key, lo, hi)
+        found = mid < hi and keys[mid] == key
+        left, right = a.left, a.right
+        child_rank = self._child_rank(a, a_rank)
+        changes = self._setop_changes
+        left_rank = right_rank = child_rank
+        if lo < mid:
+            if left is nil:
+                left, left_rank = self._build_run(nodes, lo, mid)
+            else:
+                left, left_rank = self._union(left, child_rank, nodes, keys, lo, mid)
+        if found:
+            mid += 1
+        if mid < hi:
+            if right is nil:
+                right, right_rank = self._build_run(nodes, mid, hi)
+            else:
+                right, right_rank = self._union(right, child_rank, nodes, keys, mid, hi)
+        if self._setop_changes == changes:
+            return a, a_rank
+        return self._join(left, left_rank, a, right, right_rank)
+
+    def _build_run(self, nodes, lo, hi):
+        self._setop_changes += 1
+        root, _ = self._build_balanced(nodes, lo, hi, 0, (hi - lo).bit_length() - 1, self.NIL)
+        return root, self._root_rank(root)
+
+    def _intersection(self, a, a_rank, keys, lo, hi):
+        nil = self.NIL
+        key = a.key
+        mid = bisect_left(keys, key, lo, hi)
+        found = mid < hi and keys[mid] == key
+        left, right = a.left, a.right
+        child_rank = self._child_rank(a, a_rank)
+        changes = self._setop_changes
+        if left is nil or mid == lo:
+            if left is not nil:
+                self._setop_changes += 1
+            left, left_rank = nil, 0
+        else:
+            left, left_rank = self._intersection(left, child_rank, keys, lo, mid)
+        if found:
+            mid += 1
+        if right is nil or mid == hi:
+            if right is not nil:
+                self._setop_changes += 1
+            right, right_rank = nil, 0
+        else:
+            right, right_rank = self._intersection(right, child_rank, keys, mid, hi)
+        if not found:
+            self._setop_changes += 1
+            return self._join2(left, left_rank, right, right_rank)
+        if self._setop_changes == changes:
+            return a, a_rank
+        return self._join(left, left_rank, a, right, right_rank)
+
+    def _difference(self, a, a_rank, keys, lo, hi):
+        nil = self.NIL
+        key = a.key
+        mid = bisect_left(keys, key, lo, hi)
+        found = mid < hi and keys[mid] == key
+        left, right = a.left, a.right
+        child_rank = self._child_rank(a, a_rank)
+        changes = self._setop_changes
+        left_rank = right_rank = child_rank
+        if left is not nil and lo < mid:
+            left, left_rank = self._difference(left, child_rank, keys, lo, mid)
+        if found:
+            mid += 1
+        if right is not nil and mid < hi:
+            right, right_rank = self._difference(right, child_rank, keys, mid, hi)
+        if found:
+            self._setop_changes += 1
+            return self._join2(left, left_rank, right, right_rank)
+        if self._setop_changes == changes:
+            return a, a_rank
+        return self._join(left, left_rank, a, right, right_rank)
+
+    def _adopt(self, root):
+        root.parent = self.NIL
+        self.root = root
+        self._finger = self.NIL
+        self._reset_extremes()
+        return self
+
+    def _check_compatible(self, other):
+        if type(other) is not type(self):
+            raise TypeError(f"Ожидалось дерево {type(self).__name__}, получено {type(other).__name__}")
+        if other.NIL is not self.NIL:
+            raise ValueError("Деревья используют разные NIL-узлы и не могут обмениваться поддеревьями")
+
+    def _take_root(self, other):
+        self._check_compatible(other)
+        root = other.root
+        other._adopt(other.NIL)
+        return root, self._root_rank(root)
+
+    def join(self, other):
+        self._check_compatible(other)
+        if not self._is_nil(self.root) and not self._is_nil(other.root) and \
+                not self._maximum(self.root).key < other._minimum(other.root).key:
+            raise ValueError("Все ключи присоединяемого дерева должны быть больше ключей текущего")
+        joined, _ = self._join2(self.root, self._root_rank(self.root), *self._take_root(other))
+        return self._adopt(joined)
+
+    def split(self, key):
+        less, _, found, greater, greater_rank = self._split(self.root, self._root_rank(self.root), key)
+        if found is not self.NIL:
+            greater, _ = self._join(self.NIL, 0, found, greater, greater_rank)
+        left = type(self)(self.order_stats, self.finger)._adopt(less)
+        right = type(self)(self.order_stats, self.finger)._adopt(greater)
+        self._adopt(self.NIL)
+        return left, right
+
+    def _small_side(self, other, op):
+        if not (self.order_stats and other.order_stats):
+            return None
+        ratio = self._setop_loop_ratios[op]
+        if other.root.size * ratio <= self.root.size:
+            return other
+        if self.root.size * ratio <= other.root.size:
+            return self
+        return None
+
+    def _walk_order(self, other):
+        if self.order_stats and other.order_stats and self.root.size < other.root.size:
+            return other, self
+        return self, other
+
+    def _keys_found_in(self, keys, present):
+        nil = self.NIL
+        return [key for key in keys if (self.find(key) is not nil) == present]
+
+    def union(self, other):
+        self._check_compatible(other)
+        small = self._small_side(other, "union")
+        if small is None:
+            walked, flat = self._walk_order(other)
+            root = walked.root
+            nodes = list(flat._iter_inorder_nodes())
+            other._adopt(other.NIL)
+            if root is self.NIL:
+                self._link_sorted(nodes)
+                return self
+            keys = [node.key for node in nodes]
+            result, _ = self._union(root, self._root_rank(root), nodes, keys, 0, len(keys))
+            return self._adopt(result)
+
+        if small is self:
+            keys = list(self.iter_inorder())
+            self._adopt(self._take_root(other)[0])
+        else:
+            keys = other.iter_inorder()
+        for key in keys:
+            self.insert(key)
+        return self
+
+    def intersection(self, other):
+        self._check_compatible(other)
+        small = self._small_side(other, "intersection")
+        if small is None:
+            walked, flat = self._walk_order(other)
+            root = walked.root
+            keys = flat.inorder()
+            if walked is other:
+                other._adopt(other.NIL)
+            if root is self.NIL or not keys:
+                return self._adopt(self.NIL)
+            result, _ = self._intersection(root, self._root_rank(root), keys, 0, len(keys))
+            return self._adopt(result)
+
+        large = other if small is self else self
+        return self.bulk_load(large._keys_found_in(small.iter_inorder(), True))
+
+    def difference(self, other):
+        self._check_compatible(other)
+        small = self._small_side(other, "difference")
+        if small is None:
+            keys = other.inorder()
+            if self.root is self.NIL or not keys:
+                return self
+            result, _ = self._difference(self.root, self._root_rank(self.root), keys, 0, len(keys))
+            return self._adopt(result)
+
+        if small is self:
+            return self.bulk_load(other._keys_found_in(self.iter_inorder(), False))
+
+        for key in other.iter_inorder():
+            self.delete(key)
+        return self
+
+    def _update_sizes(self, node):
+        while not self._is_nil(node):
+            node.size = node.left.size + node.right.size + 1
+            node = node.parent
+
     def _delete(self, node_to_delete):
         if self._is_nil(node_to_delete):
             return self.NIL
 
+        fix_from = node_to_delete.parent
         if self._is_nil(node_to_delete.left):
             self._transplant(node_to_delete, node_to_delete.right)
         elif self._is_nil(node_to_delete.right):
@@ -140,99 +1078,164 @@ class BST:
             y = self._minimum(node_to_delete.right)
 
             if y.parent != node_to_delete:
+                fix_from = y.parent
                 self._transplant(y, y.right)
                 y.right = node_to_delete.right
                 y.right.parent = y
+            else:
+                fix_from = y
 
             self._transplant(node_to_delete, y)
             y.left = node_to_delete.left
             y.left.parent = y
 
+        if self.order_stats:
+            self._update_sizes(fix_from)
+
         return node_to_delete.parent
 
     def delete(self, key):
-        z = self.find(key)
+        z = self._locate(key, "delete")
         if self._is_nil(z):
             return self.NIL
+        self._forget(z)
         return self._delete(z)
 
-    def preorder(self, node=None, result=None):
-        if result is None:
-            result = []
+    def _iter_preorder_nodes(self, node=None):
+        if node is None:
             node = self.root
-
         if self._is_nil(node):
-            return result
+            return
+
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield node
+            if not self._is_nil(node.right):
+                stack.append(node.right)
+            if not self._is_nil(node.left):
+                stack.append(node.left)
+
+    def iter_preorder(self, node=None):
+        for current in self._iter_preorder_nodes(node):
+            yield current.key
+
+    def _iter_inorder_nodes(self, node=None):
+        if node is None:
+            node = self.root
 
-        result.append(node.key)
-        self.preorder(node.left, result)
-        self.preorder(node.right, result)
+        stack = []
+        while stack or not self._is_nil(node):
+            while not self._is_nil(node):
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
 
-        return result
+    def iter_inorder(self, node=None):
+        for current in self._iter_inorder_nodes(node):
+            yield current.key
 
-    def inorder(self, node=None, result=None):
-        if result is None:
-            result = []
+    def iter_postorder(self, node=None):
+        if node is None:
             node = self.root
 
-        if self._is_nil(node):
-            return result
+        stack = []
+        last = self.NIL
+        while stack or not self._is_nil(node):
+            if not self._is_nil(node):
+                stack.append(node)
+                node = node.left
+                continue
+
+            top = stack[-1]
+            if not self._is_nil(top.right) and last is not top.right:
+                node = top.right
+            else:
+                yield top.key
+                last = stack.pop()
 
-        self.inorder(node.left, result)
-        result.append(node.key)
-        self.inorder(node.right, result)
+    def __iter__(self):
+        return self.iter_inorder()
 
+    def preorder(self, node=None, result=None):
+        if result is None:
+            result = []
+        result.extend(self.iter_preorder(node))
+        return result
+
+    def inorder(self, node=None, result=None):
+        if result is None:
+            result = []
+        result.extend(self.iter_inorder(node))
         return result
 
     def postorder(self, node=None, result=None):
         if result is None:
             result = []
-            node = self.root
+        result.extend(self.iter_postorder(node))
+        return result
 
-        if self._is_nil(node):
-            return result
+    def _iter_level_nodes(self, max_depth=None):
+        level = [] if self._is_nil(self.root) else [self.root]
+        depth = 0
 
-        self.postorder(node.left, result)
-        self.postorder(node.right, result)
-        result.append(node.key)
+        while level and (max_depth is None or depth <= max_depth):
+            yield depth, level
 
-        return result
+            next_level = []
+            for node in level:
+                if not self._is_nil(node.left):
+                    next_level.append(node.left)
+                if not self._is_nil(node.right):
+                    next_level.append(node.right)
 
-    def levelorder(self):
-        if self._is_nil(self.root):
-            return []
+            level = next_level
+            depth += 1
 
-        result = []
-        queue = [self.root]
+    def iter_levels(self, max_depth=None):
+        for depth, nodes in self._iter_level_nodes(max_depth):
+            yield depth, [node.key for node in nodes]
 
-        while queue:
-            current = queue.pop(0)
+    def iter_levelorder(self, max_depth=None):
+        if max_depth is not None:
+            for _, keys in self.iter_levels(max_depth):
+                yield from keys
+            return
+
+        if self._is_nil(self.root):
+            return
 
-            if not self._is_nil(current):
-                result.append(current.key)
+        queue = deque([self.root])
+        while queue:
+            current = queue.popleft()
+            yield current.key
+            if not self._is_nil(current.left):
                 queue.append(current.left)
+            if not self._is_nil(current.right):
                 queue.append(current.right)
 
-        return result
+    def levelorder(self, max_depth=None):
+        return list(self.iter_levelorder(max_depth))
 
-    def levelorder_with_levels(self):
-        if self._is_nil(self.root):
-            return []
+    def levelorder_with_levels(self, max_depth=None):
+        return [keys for _, keys in self.iter_levels(max_depth)]
 
-        result = []
-        queue = [(self.root, 0)]
+    def level_stats(self, max_depth=None):
+        widths = [len(nodes) for _, nodes in self._iter_level_nodes(max_depth)]
 
-        while queue:
-            current, level = queue.pop(0)
-
-            if not self._is_nil(current):
-                if len(result) <= level:
-                    result.append([])
-                result[level].append(current.key)
-                queue.append((current.left, level + 1))
-                queue.append((current.right, level + 1))
+        if not widths:
+            return {"widths": [], "levels": 0, "nodes": 0, "max_width": 0, "widest_level": None}
 
-        return result
+        max_width = max(widths)
+        return {
+            "widths": widths,
+            "levels": len(widths),
+            "nodes": sum(widths),
+            "max_width": max_width,
+            "widest_level": widths.index(max_width),
+        }
 
     def height(self, node=None):
         if node is None:
@@ -241,15 +1244,28 @@ class BST:
         if self._is_nil(node):
             return 0
 
-        left_height = self.height(node.left)
-        right_height = self.height(node.right)
+        result = 0
+        stack = [(node, 1)]
+        while stack:
+            node, depth = stack.pop()
+            if depth > result:
+                result = depth
+            if not self._is_nil(node.left):
+                stack.append((node.left, depth + 1))
+            if not self._is_nil(node.right):
+                stack.append((node.right, depth + 1))
 
-        return max(left_height, right_height) + 1
+        return result
 
 
 class AVL(BST):
-    def __init__(self):
-        super().__init__()
+    _node_class = AVLNode
+    _sorted_batches = True
+    _kind = 1
+
+    def __init__(self, order_stats=True, finger=False):
+        super().__init__(order_stats, finger)
+        self.NIL.height = 0
 
     def _height(self, node):
         if self._is_nil(node):
@@ -262,12 +1278,78 @@ class AVL(BST):
         node.height = 1 + max(self._height(node.left), self._height(node.right))
         return node.height
 
+    def _init_bulk_node(self, node, depth, height, max_depth):
+        node.height = height
+
+    def _annotation(self, node):
+        return f" [h={node.height}]"
+
+    def _dump_extra(self, nodes):
+        return bytes(node.height for node in nodes)
+
+    def _load_extra(self, nodes, extra):
+        for node, height in zip(nodes, extra):
+            node.height = height
+
     def _balance_factor(self, node):
         if self._is_nil(node):
             return 0
         return self._height(node.right) - self._height(node.left)
 
+    def _link(self, node, left, right):
+        node.left = left
+        node.right = right
+        if left is not self.NIL:
+            left.parent = node
+        if right is not self.NIL:
+            right.parent = node
+        node.size = left.size + right.size + 1
+        left_height = left.height
+        right_height = right.height
+        node.height = (left_height if left_height > right_height else right_height) + 1
+        return node
+
+    def _join_right(self, left, node, right):
+        inner, middle = left.left, left.right
+        if middle.height <= right.height + 1:
+            self._link(node, middle, right)
+            if node.height <= inner.height + 1:
+                return self._link(left, inner, node)
+            self._link(left, inner, self._rotate_right_subtree(node))
+            return self._rotate_left_subtree(left)
+
+        joined = self._join_right(middle, node, right)
+        self._link(left, inner, joined)
+        if joined.height <= inner.height + 1:
+            return left
+        return self._rotate_left_subtree(left)
+
+    def _join_left(self, left, node, right):
+        middle, inner = right.left, right.right
+        if middle.height <= left.height + 1:
+            self._link(node, left, middle)
+            if node.height <= inner.height + 1:
+                return self._link(right, node, inner)
+            self._link(right, self._rotate_left_subtree(node), inner)
+            return self._rotate_right_subtree(right)
+
+        joined = self._join_left(left, node, middle)
+        self._link(right, joined, inner)
+        if joined.height <= inner.height + 1:
+            return right
+        return self._rotate_right_subtree(right)
+
+    def _join(self, left, left_rank, node, right, right_rank):
+        if left.height > right.height + 1:
+            return self._join_right(left, node, right), 0
+        if right.height > left.height + 1:
+            return self._join_left(left, node, right), 0
+        return self._link(node, left, right), 0
+
     def _left_rotate(self, x):
+        if self.stats is not None:
+            self.stats.add("rotations")
+
         y = x.right
         T2 = y.left
 
@@ -286,12 +1368,19 @@ class AVL(BST):
         else:
             y.parent.right = y
 
+        if self.order_stats:
+            y.size = x.size
+            x.size = x.left.size + x.right.size + 1
+
         self._update_height(x)
         self._update_height(y)
 
         return y
 
     def _right_rotate(self, y):
+        if self.stats is not None:
+            self.stats.add("rotations")
+
         x = y.left
         T2 = x.right
 
@@ -310,6 +1399,10 @@ class AVL(BST):
         else:
             x.parent.right = x
 
+        if self.order_stats:
+            x.size = y.size
+            y.size = y.left.size + y.right.size + 1
+
         self._update_height(y)
         self._update_height(x)
 
@@ -338,14 +1431,17 @@ class AVL(BST):
 
         return node
 
-    def insert(self, key):
-        node = super().insert(key)
+    def insert(self, key, hint=None):
+        node = super().insert(key, hint)
         if node is None:
             return None
 
-        current = node
+        current = node.parent
         while not self._is_nil(current):
+            height = current.height
             current = self._balance(current)
+            if current.height == height:
+                break
             current = current.parent
 
         if self._is_nil(self.root) and node.parent is self.NIL:
@@ -357,48 +1453,145 @@ class AVL(BST):
         if self._is_nil(z):
             return self.NIL
 
-        y = z
-        y_original_height = y.height
-
+        current = z.parent
         if self._is_nil(z.left):
-            x = z.right
             self._transplant(z, z.right)
         elif self._is_nil(z.right):
-            x = z.left
             self._transplant(z, z.left)
         else:
             y = self._minimum(z.right)
-            y_original_height = y.height
-            x = y.right
 
             if y.parent != z:
+                current = y.parent
                 self._transplant(y, y.right)
                 y.right = z.right
                 y.right.parent = y
+            else:
+                current = y
 
             self._transplant(z, y)
             y.left = z.left
             y.left.parent = y
             y.height = z.height
 
-        current = z.parent if not self._is_nil(z.parent) else x.parent
         while not self._is_nil(current):
-            self._update_height(current)
+            if self.order_stats:
+                current.size = current.left.size + current.right.size + 1
             current = self._balance(current)
             current = current.parent
 
-        if self._is_nil(self.root) and not self._is_nil(x):
-            self.root = x
-
         return z.parent
 
 
 class RB(BST):
-    def __init__(self):
-        super().__init__()
+    _node_class = RBNode
+    _sorted_batches = True
+    _kind = 2
+    _setop_loop_ratios = {"union": 8, "intersection": 4, "difference": 8}
+
+    def __init__(self, order_stats=True, finger=False):
+        super().__init__(order_stats, finger)
         self.NIL.color = Color.BLACK
 
+    def _init_bulk_node(self, node, depth, height, max_depth):
+        node.color = Color.RED if 0 < depth == max_depth else Color.BLACK
+
+    def _root_rank(self, node):
+        height = 0
+        while node is not self.NIL:
+            if node.color is BLACK:
+                height += 1
+            node = node.left
+        return height
+
+    def _child_rank(self, node, rank):
+        return rank - 1 if node.color is BLACK else rank
+
+    def _join_right(self, left, node, right, left_height, right_height):
+        if left.color is BLACK and left_height == right_height:
+            node.color = RED
+            return self._link(node, left, right)
+
+        child_height = left_height - (left.color is BLACK)
+        joined = self._join_right(left.right, node, right, child_height, right_height)
+        self._link(left, left.left, joined)
+        if left.color is BLACK and joined.color is RED and joined.right.color is RED:
+            joined.right.color = BLACK
+            return self._rotate_left_subtree(left)
+        return left
+
+    def _join_left(self, left, node, right, left_height, right_height):
+        if right.color is BLACK and left_height == right_height:
+            node.color = RED
+            return self._link(node, left, right)
+
+        child_height = right_height - (right.color is BLACK)
+        joined = self._join_left(left, node, right.left, left_height, child_height)
+        self._link(right, joined, right.right)
+        if right.color is BLACK and joined.color is RED and joined.left.color is RED:
+            joined.left.color = BLACK
+            return self._rotate_right_subtree(right)
+        return right
+
+    def _join(self, left, left_rank, node, right, right_rank):
+        if left_rank == right_rank:
+            if left.color is BLACK and right.color is BLACK:
+                node.color = RED
+                return self._link(node, left, right), left_rank
+            node.color = BLACK
+            return self._link(node, left, right), left_rank + 1
+
+        if left.color is RED:
+            left.color = BLACK
+            left_rank += 1
+        if right.color is RED:
+            right.color = BLACK
+            right_rank += 1
+
+        if left_rank > right_rank:
+            joined = self._join_right(left, node, right, left_rank, right_rank)
+            if joined.color is RED and joined.right.color is RED:
+                joined.color = BLACK
+                return joined, left_rank + 1
+            return joined, left_rank
+        if right_rank > left_rank:
+            joined = self._join_left(left, node, right, left_rank, right_rank)
+            if joined.color is RED and joined.left.color is RED:
+                joined.color = BLACK
+                return joined, right_rank + 1
+            return joined, right_rank
+
+        node.color = RED
+        return self._link(node, left, right), left_rank
+
+    def _adopt(self, root):
+        if root is not self.NIL:
+            root.color = BLACK
+        return super()._adopt(root)
+
+    def _annotation(self, node):
+        return f" [{node.color.name}]"
+
+    def _dump_extra(self, nodes):
+        bits = bytearray((len(nodes) + 7) // 8)
+        for i, node in enumerate(nodes):
+            if node.color == Color.RED:
+                bits[i >> 3] |= 1 << (i & 7)
+        return bytes(bits)
+
+    def _load_extra(self, nodes, extra):
+        red = Color.RED
+        for start, bits in enumerate(extra):
+            start <<= 3
+            while bits:
+                low = bits & -bits
+                nodes[start + low.bit_length() - 1].color = red
+                bits ^= low
+
     def _left_rotate(self, x):
+        if self.stats is not None:
+            self.stats.add("rotations")
+
         y = x.right
         T2 = y.left
 
@@ -417,9 +1610,16 @@ class RB(BST):
         else:
             y.parent.right = y
 
+        if self.order_stats:
+            y.size = x.size
+            x.size = x.left.size + x.right.size + 1
+
         return y
 
     def _right_rotate(self, y):
+        if self.stats is not None:
+            self.stats.add("rotations")
+
         x = y.left
         T2 = x.right
 
@@ -438,9 +1638,14 @@ class RB(BST):
         else:
             x.parent.right = x
 
+        if self.order_stats:
+            x.size = y.size
+            y.size = y.left.size + y.right.size + 1
+
         return x
 
     def _balance_insert(self, z):
+        recolors = 0
         while z.parent.color == Color.RED:
             if z.parent == z.parent.parent.left:
                 y = z.parent.parent.right
@@ -449,12 +1654,14 @@ class RB(BST):
                     y.color = Color.BLACK
                     z.parent.parent.color = Color.RED
                     z = z.parent.parent
+                    recolors += 3
                 else:
                     if z == z.parent.right:
                         z = z.parent
                         self._left_rotate(z)
                     z.parent.color = Color.BLACK
                     z.parent.parent.color = Color.RED
+                    recolors += 2
                     self._right_rotate(z.parent.parent)
             else:
                 y = z.parent.parent.left
@@ -463,71 +1670,94 @@ class RB(BST):
                     y.color = Color.BLACK
                     z.parent.parent.color = Color.RED
                     z = z.parent.parent
+                    recolors += 3
                 else:
                     if z == z.parent.left:
                         z = z.parent
                         self._right_rotate(z)
                     z.parent.color = Color.BLACK
                     z.parent.parent.color = Color.RED
+                    recolors += 2
                     self._left_rotate(z.parent.parent)
 
-        self.root.color = Color.BLACK
+        if self.root.color == Color.RED:
+            self.root.color = Color.BLACK
+            recolors += 1
+
+        if self.stats is not None and recolors:
+            self.stats.add("recolors", recolors)
 
-    def _balance_delete(self, x):
+    def _balance_delete(self, x, parent):
+        recolors = 0
         while x != self.root and x.color == Color.BLACK:
-            if x == x.parent.left:
-                w = x.parent.right
+            if x is parent.left:
+                w = parent.right
 
                 if w.color == Color.RED:
                     w.color = Color.BLACK
-                    x.parent.color = Color.RED
-                    self._left_rotate(x.parent)
-                    w = x.parent.right
+                    parent.color = Color.RED
+                    recolors += 2
+                    self._left_rotate(parent)
+                    w = parent.right
 
                 if w.left.color == Color.BLACK and w.right.color == Color.BLACK:
                     w.color = Color.RED
-                    x = x.parent
+                    recolors += 1
+                    x = parent
+                    parent = x.parent
                 else:
                     if w.right.color == Color.BLACK:
                         w.left.color = Color.BLACK
                         w.color = Color.RED
+                        recolors += 2
                         self._right_rotate(w)
-                        w = x.parent.right
+                        w = parent.right
 
-                    w.color = x.parent.color
-                    x.parent.color = Color.BLACK
+                    w.color = parent.color
+                    parent.color = Color.BLACK
                     w.right.color = Color.BLACK
-                    self._left_rotate(x.parent)
+                    self._left_rotate(parent)
+                    recolors += 3
                     x = self.root
             else:
-                w = x.parent.left
+                w = parent.left
 
                 if w.color == Color.RED:
                     w.color = Color.BLACK
-                    x.parent.color = Color.RED
-                    self._right_rotate(x.parent)
-                    w = x.parent.left
+                    parent.color = Color.RED
+                    recolors += 2
+                    self._right_rotate(parent)
+                    w = parent.left
 
                 if w.right.color == Color.BLACK and w.left.color == Color.BLACK:
                     w.color = Color.RED
-                    x = x.parent
+                    recolors += 1
+                    x = parent
+                    parent = x.parent
                 else:
                     if w.left.color == Color.BLACK:
                         w.right.color = Color.BLACK
                         w.color = Color.RED
+                        recolors += 2
                         self._left_rotate(w)
-                        w = x.parent.left
+                        w = parent.left
 
-                    w.color = x.parent.color
-                    x.parent.color = Color.BLACK
+                    w.color = parent.color
+                    parent.color = Color.BLACK
                     w.left.color = Color.BLACK
-                    self._right_rotate(x.parent)
+                    self._right_rotate(parent)
+                    recolors += 3
                     x = self.root
 
-        x.color = Color.BLACK
+        if x.color == Color.RED:
+            x.color = Color.BLACK
+            recolors += 1
 
-    def insert(self, key):
-        node = super().insert(key)
+        if self.stats is not None and recolors:
+            self.stats.add("recolors", recolors)
+
+    def insert(self, key, hint=None):
+        node = super().insert(key, hint)
         if node is None:
             return None
 
@@ -542,9 +1772,11 @@ class RB(BST):
 
         if self._is_nil(z.left):
             x = z.right
+            x_parent = z.parent
             self._transplant(z, z.right)
         elif self._is_nil(z.right):
             x = z.left
+            x_parent = z.parent
             self._transplant(z, z.left)
         else:
             y = self._minimum(z.right)
@@ -552,27 +1784,548 @@ class RB(BST):
             x = y.right
 
             if y.parent != z:
+                x_parent = y.parent
                 self._transplant(y, y.right)
                 y.right = z.right
                 y.right.parent = y
+            else:
+                x_parent = y
 
             self._transplant(z, y)
             y.left = z.left
             y.left.parent = y
             y.color = z.color
 
+        if self.order_stats:
+            self._update_sizes(x_parent)
+
         if y_original_color == Color.BLACK:
-            self._balance_delete(x)
+            self._balance_delete(x, x_parent)
 
         return z.parent
 
     def delete(self, key):
-        z = self.find(key)
+        z = self._locate(key, "delete")
         if self._is_nil(z):
             return self.NIL
+        self._forget(z)
         return self._rb_delete(z)
 
 
+class MappedTree:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = None
+        self._keys = None
+        try:
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{path}: пустой файл") from None
+            if len(self._map) < TREE_HEADER.size:
+                raise ValueError(f"{path}: файл короче заголовка")
+
+            magic, version, kind, n = TREE_HEADER.unpack_from(self._map)
+            if magic != TREE_MAGIC or version != TREE_FORMAT_VERSION:
+                raise ValueError(f"{path}: не файл дерева или неподдерживаемая версия формата")
+            if len(self._map) < TREE_HEADER.size + 8 * n:
+                raise ValueError(f"{path}: файл обрезан, ожидалось {n} ключей")
+            self.kind = kind
+            self._keys = memoryview(self._map)[TREE_HEADER.size:TREE_HEADER.size + 8 * n].cast("q")
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self._keys)
+
+    def find(self, key):
+        keys = self._keys
+        lo, hi = 0, len(keys)
+        while lo < hi:
+            current = keys[lo]
+            if key == current:
+                return current
+            split = bisect_right(keys, current, lo + 1, hi)
+            if key < current:
+                lo, hi = lo + 1, split
+            else:
+                lo = split
+        return None
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def close(self):
+        if self._map is not None:
+            if self._keys is not None:
+                self._keys.release()
+                self._keys = None
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BTreeNode:
+    __slots__ = ("keys", "children")
+
+    def __init__(self, keys=None, children=None):
+        self.keys = keys if keys is not None else []
+        self.children = children if children is not None else []
+
+    def __str__(self) -> str:
+        return str(self.keys)
+
+
+class BTree:
+    def __init__(self, order=BTREE_ORDER):
+        if order < 3:
+            raise ValueError("Порядок B-дерева должен быть не меньше 3")
+        self.order = order
+        self.max_keys = order - 1
+        self.min_keys = (order + 1) // 2 - 1
+        self.root = BTreeNode()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __str__(self) -> str:
+        if not self.root.keys:
+            return "Empty tree"
+
+        out = io.StringIO()
+        self.render(out, max_nodes=STR_MAX_NODES)
+        return out.getvalue()
+
+    def render(self, out=None, max_depth=None, max_nodes=None):
+        if out is None:
+            out = sys.stdout
+        if not self.root.keys:
+            out.write("Empty tree\n")
+            return 0
+
+        def children(node):
+            return [(child, f"{i}: ") for i, child in enumerate(node.children)]
+
+        return _render_tree(out, self.root, children, str, max_depth, max_nodes)
+
+    def find(self, key):
+        node = self.root
+        while True:
+            keys = node.keys
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return keys[i]
+            if not node.children:
+                return None
+            node = node.children[i]
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def insert(self, key):
+        path = []
+        node = self.root
+        while True:
+            keys = node.keys
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return None
+            if not node.children:
+                break
+            path.append((node, i))
+            node = node.children[i]
+
+        node.keys.insert(i, key)
+        self._size += 1
+
+        while len(node.keys) > self.max_keys:
+            mid = len(node.keys) // 2
+            median = node.keys[mid]
+            right = BTreeNode(node.keys[mid + 1:], node.children[mid + 1:])
+            del node.keys[mid:]
+            del node.children[mid + 1:]
+
+            if not path:
+                self.root = BTreeNode([median], [node, right])
+                break
+            node, i = path.pop()
+            node.keys.insert(i, median)
+            node.children.insert(i + 1, right)
+
+        return key
+
+    def insert_many(self, keys):
+        inserted = 0
+        for key in keys:
+            if self.insert(key) is not None:
+                inserted += 1
+        return inserted
+
+    def delete(self, key):
+        path = []
+        node = self.root
+        while True:
+            keys = node.keys
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                break
+            if not node.children:
+                return False
+            path.append((node, i))
+            node = node.children[i]
+
+        if node.children:
+            path.append((node, i))
+            leaf = node.children[i]
+            while leaf.children:
+                path.append((leaf, len(leaf.children) - 1))
+                leaf = leaf.children[-1]
+            node.keys[i] = leaf.keys.pop()
+            node = leaf
+        else:
+            del node.keys[i]
+        self._size -= 1
+
+        while path and len(node.keys) < self.min_keys:
+            node, i = path.pop()
+            self._fix_child(node, i)
+
+        if not self.root.keys and self.root.children:
+            self.root = self.root.children[0]
+        return True
+
+    def _fix_child(self, parent, i):
+        child = parent.children[i]
+
+        if i > 0 and len(parent.children[i - 1].keys) > self.min_keys:
+            left = parent.children[i - 1]
+            child.keys.insert(0, parent.keys[i - 1])
+            parent.keys[i - 1] = left.keys.pop()
+            if left.children:
+                child.children.insert(0, left.children.pop())
+            return
+
+        if i + 1 < len(parent.children) and len(parent.children[i + 1].keys) > self.min_keys:
+            right = parent.children[i + 1]
+            child.keys.append(parent.keys[i])
+            parent.keys[i] = right.keys.pop(0)
+            if right.children:
+                child.children.append(right.children.pop(0))
+            return
+
+        if i + 1 == len(parent.children):
+            i -= 1
+        left = parent.children[i]
+        right = parent.children.pop(i + 1)
+        left.keys.append(parent.keys.pop(i))
+        left.keys.extend(right.keys)
+        left.children.extend(right.children)
+
+    def find_min(self):
+        node = self.root
+        while node.children:
+            node = node.children[0]
+        return node.keys[0] if node.keys else None
+
+    def find_max(self):
+        node = self.root
+        while node.children:
+            node = node.children[-1]
+        return node.keys[-1] if node.keys else None
+
+    def iter_inorder(self):
+        stack = [(self.root, 0)]
+        while stack:
+            node, i = stack.pop()
+            if not node.children:
+                yield from node.keys
+                continue
+            if i > 0:
+                yield node.keys[i - 1]
+            if i + 1 < len(node.children):
+                stack.append((node, i + 1))
+            stack.append((node.children[i], 0))
+
+    def __iter__(self):
+        return self.iter_inorder()
+
+    def iter_preorder(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield from node.keys
+            stack.extend(reversed(node.children))
+
+    def iter_postorder(self):
+        stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded or not node.children:
+                yield from node.keys
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+
+    def iter_levels(self, max_depth=None):
+        level = [self.root] if self.root.keys else []
+        depth = 0
+        while level and (max_depth is None or depth <= max_depth):
+            yield depth, [key for node in level for key in node.keys]
+            level = [child for node in level for child in node.children]
+            depth += 1
+
+    def iter_levelorder(self, max_depth=None):
+        for _, keys in self.iter_levels(max_depth):
+            yield from keys
+
+    def preorder(self):
+        return list(self.iter_preorder())
+
+    def inorder(self):
+        return list(self.iter_inorder())
+
+    def postorder(self):
+        return list(self.iter_postorder())
+
+    def levelorder(self, max_depth=None):
+        return list(self.iter_levelorder(max_depth))
+
+    def levelorder_with_levels(self, max_depth=None):
+        return [keys for _, keys in self.iter_levels(max_depth)]
+
+    def height(self):
+        if not self.root.keys:
+            return 0
+
+        result = 1
+        node = self.root
+        while node.children:
+            node = node.children[0]
+            result += 1
+        return result
+
+
+class PersistentNode:
+    __slots__ = ("key", "left", "right", "height", "size")
+
+    def __init__(self, key, left=None, right=None):
+        self.key = key
+        self.left = left
+        self.right = right
+        self.height = 1 + max(left.height if left else 0, right.height if right else 0)
+        self.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+    def __str__(self) -> str:
+        return str(self.key)
+
+
+def _persistent_height(node):
+    return node.height if node else 0
+
+
+def _persistent_balance(key, left, right):
+    left_height = left.height if left else 0
+    right_height = right.height if right else 0
+
+    if left_height > right_height + 1:
+        if _persistent_height(left.left) >= _persistent_height(left.right):
+            return PersistentNode(left.key, left.left, PersistentNode(key, left.right, right))
+        middle = left.right
+        return PersistentNode(middle.key, PersistentNode(left.key, left.left, middle.left),
+                              PersistentNode(key, middle.right, right))
+
+    if right_height > left_height + 1:
+        if _persistent_height(right.right) >= _persistent_height(right.left):
+            return PersistentNode(right.key, PersistentNode(key, left, right.left), right.right)
+        middle = right.left
+        return PersistentNode(middle.key, PersistentNode(key, left, middle.left),
+                              PersistentNode(right.key, middle.right, right.right))
+
+    return PersistentNode(key, left, right)
+
+
+def _persistent_insert(node, key):
+    if node is None:
+        return PersistentNode(key)
+    if key < node.key:
+        left = _persistent_insert(node.left, key)
+        if left is node.left:
+            return node
+        return _persistent_balance(node.key, left, node.right)
+    if key > node.key:
+        right = _persistent_insert(node.right, key)
+        if right is node.right:
+            return node
+        return _persistent_balance(node.key, node.left, right)
+    return node
+
+
+def _persistent_delete_min(node):
+    if node.left is None:
+        return node.key, node.right
+    key, left = _persistent_delete_min(node.left)
+    return key, _persistent_balance(node.key, left, node.right)
+
+
+def _persistent_delete(node, key):
+    if node is None:
+        return None
+    if key < node.key:
+        left = _persistent_delete(node.left, key)
+        if left is node.left:
+            return node
+        return _persistent_balance(node.key, left, node.right)
+    if key > node.key:
+        right = _persistent_delete(node.right, key)
+        if right is node.right:
+            return node
+        return _persistent_balance(node.key, node.left, right)
+
+    if node.left is None:
+        return node.right
+    if node.right is None:
+        return node.left
+    successor, right = _persistent_delete_min(node.right)
+    return _persistent_balance(successor, node.left, right)
+
+
+class PersistentAVL:
+    def __init__(self, root=None, version=0):
+        self._state = (root, version)
+        self._write_lock = threading.Lock()
+
+    @property
+    def root(self):
+        return self._state[0]
+
+    @property
+    def version(self):
+        return self._state[1]
+
+    @classmethod
+    def from_sorted(cls, keys):
+        keys = list(keys)
+        if not all(a < b for a, b in zip(keys, islice(keys, 1, None))):
+            keys = sorted(set(keys))
+
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            return PersistentNode(keys[mid], build(lo, mid), build(mid + 1, hi))
+
+        return cls(build(0, len(keys)))
+
+    def snapshot(self):
+        root, version = self._state
+        return PersistentAVL(root, version)
+
+    def __len__(self):
+        root = self.root
+        return root.size if root else 0
+
+    def __str__(self) -> str:
+        if self.root is None:
+            return "Empty tree"
+
+        out = io.StringIO()
+        self.render(out, max_nodes=STR_MAX_NODES)
+        return out.getvalue()
+
+    def render(self, out=None, max_depth=None, max_nodes=None):
+        if out is None:
+            out = sys.stdout
+        if self.root is None:
+            out.write("Empty tree\n")
+            return 0
+
+        def children(node):
+            return [(child, side) for child, side in ((node.left, "L: "), (node.right, "R: "))
+                    if child is not None]
+
+        return _render_tree(out, self.root, children, str, max_depth, max_nodes, len(self))
+
+    def _apply(self, operation, key):
+        with self._write_lock:
+            root, version = self._state
+            updated = operation(root, key)
+            if updated is root:
+                return root, version, False
+            version += 1
+            self._state = (updated, version)
+        return updated, version, True
+
+    def insert(self, key):
+        root, version, _ = self._apply(_persistent_insert, key)
+        return PersistentAVL(root, version)
+
+    def insert_many(self, keys):
+        inserted = 0
+        for key in keys:
+            if self._apply(_persistent_insert, key)[2]:
+                inserted += 1
+        return inserted
+
+    def delete(self, key):
+        root, version, _ = self._apply(_persistent_delete, key)
+        return PersistentAVL(root, version)
+
+    def find(self, key):
+        node = self.root
+        while node is not None:
+            if key == node.key:
+                return node.key
+            node = node.left if key < node.key else node.right
+        return None
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def find_min(self):
+        node = self.root
+        if node is None:
+            return None
+        while node.left is not None:
+            node = node.left
+        return node.key
+
+    def find_max(self):
+        node = self.root
+        if node is None:
+            return None
+        while node.right is not None:
+            node = node.right
+        return node.key
+
+    def iter_inorder(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key
+            node = node.right
+
+    def __iter__(self):
+        return self.iter_inorder()
+
+    def inorder(self):
+        return list(self.iter_inorder())
+
+    def height(self):
+        return _persistent_height(self.root)
+
+
 def avl_theoretical_lower_bound(n):
     if n == 0:
         return 0
@@ -597,22 +2350,45 @@ def rb_theoretical_upper_bound(n):
     return 2 * math.log2(n + 1)
 
 
-def bst_experiment_random_keys(max_n=39856, step=100):
+def btree_theoretical_lower_bound(n, order=BTREE_ORDER):
+    if n == 0:
+        return 0
+    return math.log(n + 1, order)
+
+
+def btree_theoretical_upper_bound(n, order=BTREE_ORDER):
+    if n == 0:
+        return 0
+    return 1 + math.log((n + 1) / 2, (order + 1) // 2)
+
+
+def _checkpoint_height(tree):
+    if isinstance(tree, AVL):
+        return tree._height(tree.root)
+    return tree.height()
+
+
+def _height_series(tree_cls, keys, max_n, step, incremental=True, finger=False):
     n_values = []
     heights = []
 
-    all_keys = list(range(max_n))
-    random.shuffle(all_keys)
+    tree = tree_cls(finger=True) if finger else tree_cls()
+    inserted = 0
 
     for n in range(0, max_n + 1, step):
         n_values.append(n)
 
         if n == 0:
             height = 0
+        elif incremental:
+            while inserted < n:
+                tree.insert(keys[inserted])
+                inserted += 1
+            height = _checkpoint_height(tree)
         else:
-            tree = BST()
+            tree = tree_cls(finger=True) if finger else tree_cls()
             for i in range(n):
-                tree.insert(all_keys[i])
+                tree.insert(keys[i])
             height = tree.height()
 
         heights.append(height)
@@ -620,113 +2396,202 @@ def bst_experiment_random_keys(max_n=39856, step=100):
     return n_values, heights
 
 
-def avl_experiment_random_keys(max_n=38767, step=100):
-    n_values = []
-    heights = []
-    lower_bounds = []
-    upper_bounds = []
-
+def _shuffled_keys(max_n, seed=None):
     all_keys = list(range(max_n))
-    random.shuffle(all_keys)
+    if seed is None:
+        random.shuffle(all_keys)
+    else:
+        random.Random(seed).shuffle(all_keys)
+    return all_keys
 
-    for n in range(0, max_n + 1, step):
-        n_values.append(n)
 
-        if n == 0:
-            height = 0
-        else:
-            tree = AVL()
-            for i in range(n):
-                tree.insert(all_keys[i])
-            height = tree.height()
+def _report_time(name, started, incremental):
+    mode = "инкрементально" if incremental else "с перестроением"
+    print(f"{name}: {time.perf_counter() - started:.2f} с ({mode})")
 
-        heights.append(height)
-        lower_bounds.append(avl_theoretical_lower_bound(n))
-        upper_bounds.append(avl_theoretical_upper_bound(n))
 
+def bst_experiment_random_keys(max_n=39856, step=100, seed=None, incremental=True):
+    started = time.perf_counter()
+
+    all_keys = _shuffled_keys(max_n, seed)
+    n_values, heights = _height_series(BST, all_keys, max_n, step, incremental)
+
+    _report_time("BST, случайные ключи", started, incremental)
+    return n_values, heights
+
+
+def avl_experiment_random_keys(max_n=38767, step=100, seed=None, incremental=True):
+    started = time.perf_counter()
+
+    all_keys = _shuffled_keys(max_n, seed)
+    n_values, heights = _height_series(AVL, all_keys, max_n, step, incremental)
+    lower_bounds = [avl_theoretical_lower_bound(n) for n in n_values]
+    upper_bounds = [avl_theoretical_upper_bound(n) for n in n_values]
+
+    _report_time("AVL, случайные ключи", started, incremental)
     return n_values, heights, lower_bounds, upper_bounds
 
 
-def rb_experiment_random_keys(max_n=32345, step=100):
-    n_values = []
-    heights = []
-    lower_bounds = []
-    upper_bounds = []
+def rb_experiment_random_keys(max_n=32345, step=100, seed=None, incremental=True):
+    started = time.perf_counter()
 
-    all_keys = list(range(max_n))
-    random.shuffle(all_keys)
+    all_keys = _shuffled_keys(max_n, seed)
+    n_values, heights = _height_series(RB, all_keys, max_n, step, incremental)
+    lower_bounds = [rb_theoretical_lower_bound(n) for n in n_values]
+    upper_bounds = [rb_theoretical_upper_bound(n) for n in n_values]
 
-    for n in range(0, max_n + 1, step):
-        n_values.append(n)
+    _report_time("RB, случайные ключи", started, incremental)
+    return n_values, heights, lower_bounds, upper_bounds
 
-        if n == 0:
-            height = 0
-        else:
-            tree = RB()
-            for i in range(n):
-                tree.insert(all_keys[i])
-            height = tree.height()
 
-        heights.append(height)
-        lower_bounds.append(rb_theoretical_lower_bound(n))
-        upper_bounds.append(rb_theoretical_upper_bound(n))
+def avl_experiment_sorted_keys(max_n=23455, step=100, incremental=True):
+    started = time.perf_counter()
+
+    n_values, heights = _height_series(AVL, range(max_n), max_n, step, incremental, finger=True)
+    lower_bounds = [avl_theoretical_lower_bound(n) for n in n_values]
+    upper_bounds = [avl_theoretical_upper_bound(n) for n in n_values]
 
+    _report_time("AVL, возрастающие ключи", started, incremental)
     return n_values, heights, lower_bounds, upper_bounds
 
 
-def avl_experiment_sorted_keys(max_n=23455, step=100):
-    n_values = []
-    heights = []
-    lower_bounds = []
-    upper_bounds = []
+def rb_experiment_sorted_keys(max_n=32123, step=100, incremental=True):
+    started = time.perf_counter()
 
-    for n in range(0, max_n + 1, step):
-        n_values.append(n)
+    n_values, heights = _height_series(RB, range(max_n), max_n, step, incremental, finger=True)
+    lower_bounds = [rb_theoretical_lower_bound(n) for n in n_values]
+    upper_bounds = [rb_theoretical_upper_bound(n) for n in n_values]
 
-        if n == 0:
-            height = 0
-        else:
-            tree = AVL()
-            for i in range(n):
-                tree.insert(i)
-            height = tree.height()
+    _report_time("RB, возрастающие ключи", started, incremental)
+    return n_values, heights, lower_bounds, upper_bounds
 
-        heights.append(height)
-        lower_bounds.append(avl_theoretical_lower_bound(n))
-        upper_bounds.append(avl_theoretical_upper_bound(n))
 
+def btree_experiment_random_keys(max_n=38767, step=100, seed=None, incremental=True, order=BTREE_ORDER):
+    started = time.perf_counter()
+
+    all_keys = _shuffled_keys(max_n, seed)
+    n_values, heights = _height_series(lambda: BTree(order), all_keys, max_n, step, incremental)
+    lower_bounds = [btree_theoretical_lower_bound(n, order) for n in n_values]
+    upper_bounds = [btree_theoretical_upper_bound(n, order) for n in n_values]
+
+    _report_time(f"B-дерево порядка {order}, случайные ключи", started, incremental)
     return n_values, heights, lower_bounds, upper_bounds
 
 
-def rb_experiment_sorted_keys(max_n=32123, step=100):
-    n_values = []
-    heights = []
-    lower_bounds = []
-    upper_bounds = []
+TREE_TYPES = {"BST": BST, "AVL": AVL, "RB": RB, "BTree": BTree}
 
-    for n in range(0, max_n + 1, step):
-        n_values.append(n)
 
-        if n == 0:
-            height = 0
-        else:
-            tree = RB()
-            for i in range(n):
-                tree.insert(i)
-            height = tree.height()
+def _experiment_keys(distribution, max_n, seed):
+    if distribution == "random":
+        return _shuffled_keys(max_n, seed)
+    if distribution == "sorted":
+        return range(max_n)
+    raise ValueError(f"Неизвестное распределение ключей: {distribution}")
 
-        heights.append(height)
-        lower_bounds.append(rb_theoretical_lower_bound(n))
-        upper_bounds.append(rb_theoretical_upper_bound(n))
 
-    return n_values, heights, lower_bounds, upper_bounds
+def height_curve(tree_name, distribution, seed, max_n, step=100):
+    keys = _experiment_keys(distribution, max_n, seed)
+    tree_cls = TREE_TYPES[tree_name]
+    finger = distribution == "sorted" and issubclass(tree_cls, BST)
+    return _height_series(tree_cls, keys, max_n, step, finger=finger)
+
+
+def _percentile(sorted_values, p):
+    position = (len(sorted_values) - 1) * p / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    fraction = position - lower
+    return sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+
+
+def _aggregate_heights(n_values, curves, percentiles):
+    series = {"n": n_values, "mean": [], "min": [], "max": [], "runs": len(curves)}
+    for p in percentiles:
+        series[f"p{p}"] = []
+
+    for column in zip(*curves):
+        values = sorted(column)
+        series["mean"].append(sum(values) / len(values))
+        series["min"].append(values[0])
+        series["max"].append(values[-1])
+        for p in percentiles:
+            series[f"p{p}"].append(_percentile(values, p))
+
+    return series
+
+
+def run_height_experiments(tree_names=("BST", "AVL", "RB"), distributions=("random",),
+                           seeds=range(8), max_n=30000, step=100, workers=None,
+                           percentiles=(5, 50, 95)):
+    started = time.perf_counter()
+
+    tasks = []
+    for tree_name in tree_names:
+        for distribution in distributions:
+            task_seeds = seeds if distribution == "random" else [None]
+            for seed in task_seeds:
+                tasks.append((tree_name, distribution, seed))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        curves = list(pool.map(height_curve, *zip(*tasks),
+                               [max_n] * len(tasks), [step] * len(tasks)))
+
+    grouped = {}
+    for (tree_name, distribution, _), (n_values, heights) in zip(tasks, curves):
+        grouped.setdefault((tree_name, distribution), (n_values, []))[1].append(heights)
+
+    results = {}
+    for group, (n_values, group_curves) in grouped.items():
+        results[group] = _aggregate_heights(n_values, group_curves, percentiles)
+
+    print(f"Серия экспериментов ({len(tasks)} запусков): {time.perf_counter() - started:.2f} с")
+    return results
+
+
+def _seed_series(tree_name, max_n, seeds, workers):
+    series = run_height_experiments((tree_name,), ("random",), seeds, max_n, workers=workers)
+    return series[(tree_name, "random")]
+
+
+def _plot_seed_band(ax, series):
+    if series is not None:
+        ax.fill_between(series["n"], series["min"], series["max"], color='b', alpha=0.15,
+                        label=f'Разброс по {series["runs"]} seed (min–max)')
+
+
+def rebalance_experiment(tree_name, max_n=30000, step=100, distribution="random", seed=None):
+    keys = _experiment_keys(distribution, max_n, seed)
+    tree = TREE_TYPES[tree_name]()
+    stats = tree.enable_stats()
 
+    series = {"n": [], "height": [], "rotations": [], "recolors": [], "avg_path": []}
+    inserted = 0
+
+    for n in range(0, max_n + 1, step):
+        while inserted < n:
+            tree.insert(keys[inserted])
+            inserted += 1
+
+        series["n"].append(n)
+        series["height"].append(_checkpoint_height(tree))
+        series["rotations"].append(stats.totals["rotations"])
+        series["recolors"].append(stats.totals["recolors"])
+        series["avg_path"].append(stats.totals["path_length"] / n if n else 0)
+
+    return series
 
-def plot_bst_results():
-    n_values, heights = bst_experiment_random_keys()
+
+def plot_bst_results(seeds=None, workers=None):
+    series = None
+    if seeds is None:
+        n_values, heights = bst_experiment_random_keys()
+    else:
+        series = _seed_series("BST", 39856, seeds, workers)
+        n_values, heights = series["n"], series["mean"]
 
     plt.figure(figsize=(10, 6))
     plt.plot(n_values, heights, 'b-', label='Экспериментальная высота BST', linewidth=2, alpha=0.7)
+    _plot_seed_band(plt.gca(), series)
 
     log_n = [math.log2(n + 1) if n > 0 else 0 for n in n_values]
     sqrt_n = [math.sqrt(n) for n in n_values]
@@ -743,13 +2608,25 @@ def plot_bst_results():
     plt.show()
 
 
-def plot_avl_rb_random_results():
-    n_avl, h_avl, lb_avl, ub_avl = avl_experiment_random_keys()
-    n_rb, h_rb, lb_rb, ub_rb = rb_experiment_random_keys()
+def plot_avl_rb_random_results(seeds=None, workers=None):
+    avl_series = rb_series = None
+    if seeds is None:
+        n_avl, h_avl, lb_avl, ub_avl = avl_experiment_random_keys()
+        n_rb, h_rb, lb_rb, ub_rb = rb_experiment_random_keys()
+    else:
+        avl_series = _seed_series("AVL", 38767, seeds, workers)
+        rb_series = _seed_series("RB", 32345, seeds, workers)
+        n_avl, h_avl = avl_series["n"], avl_series["mean"]
+        n_rb, h_rb = rb_series["n"], rb_series["mean"]
+        lb_avl = [avl_theoretical_lower_bound(n) for n in n_avl]
+        ub_avl = [avl_theoretical_upper_bound(n) for n in n_avl]
+        lb_rb = [rb_theoretical_lower_bound(n) for n in n_rb]
+        ub_rb = [rb_theoretical_upper_bound(n) for n in n_rb]
 
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
 
     ax1.plot(n_avl, h_avl, 'b-', label='Экспериментальная высота', linewidth=2, alpha=0.7)
+    _plot_seed_band(ax1, avl_series)
     ax1.plot(n_avl, lb_avl, 'r--', label='Нижняя оценка: log₂(n+1)', linewidth=1.5)
     ax1.plot(n_avl, ub_avl, 'g--', label='Верхняя оценка: 1.44*log₂(n+2)', linewidth=1.5)
     ax1.set_xlabel('Количество ключей (n)')
@@ -760,6 +2637,7 @@ def plot_avl_rb_random_results():
     ax1.set_xlim(0, max(n_avl))
 
     ax2.plot(n_rb, h_rb, 'b-', label='Экспериментальная высота', linewidth=2, alpha=0.7)
+    _plot_seed_band(ax2, rb_series)
     ax2.plot(n_rb, lb_rb, 'r--', label='Нижняя оценка: log₂(n+1)', linewidth=1.5)
     ax2.plot(n_rb, ub_rb, 'g--', label='Верхняя оценка: 2*log₂(n+1)', linewidth=1.5)
     ax2.set_xlabel('Количество ключей (n)')
@@ -803,6 +2681,61 @@ def plot_avl_rb_sorted_results():
     plt.show()
 
 
+def plot_btree_results(orders=(4, 16, BTREE_ORDER)):
+    fig, axes = plt.subplots(1, len(orders), figsize=(6 * len(orders), 6))
+
+    for ax, order in zip(axes, orders):
+        n_values, heights, lower, upper = btree_experiment_random_keys(order=order)
+        ax.plot(n_values, heights, 'b-', label='Экспериментальная высота', linewidth=2, alpha=0.7)
+        ax.plot(n_values, lower, 'r--', label=f'Нижняя оценка: log_{order}(n+1)', linewidth=1.5)
+        ax.plot(n_values, upper, 'g--', label=f'Верхняя оценка: 1+log_{(order + 1) // 2}((n+1)/2)',
+                linewidth=1.5)
+        ax.set_xlabel('Количество ключей (n)')
+        ax.set_ylabel('Высота дерева (уровней)')
+        ax.set_title(f'Высота B-дерева порядка {order}\n(случайные ключи)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+        ax.set_xlim(0, max(n_values))
+
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_rebalance_stats(max_n=30000, distribution="random", seed=None):
+    avl = rebalance_experiment("AVL", max_n, distribution=distribution, seed=seed)
+    rb = rebalance_experiment("RB", max_n, distribution=distribution, seed=seed)
+
+    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 6))
+
+    ax1.plot(avl["n"], avl["rotations"], 'b-', label='AVL: повороты', linewidth=2, alpha=0.7)
+    ax1.plot(rb["n"], rb["rotations"], 'r-', label='RB: повороты', linewidth=2, alpha=0.7)
+    ax1.plot(rb["n"], rb["recolors"], 'r--', label='RB: перекраски', linewidth=1.5, alpha=0.7)
+    ax1.set_xlabel('Количество ключей (n)')
+    ax1.set_ylabel('Всего операций')
+    ax1.set_title('Работа по балансировке при вставке')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    ax2.plot(avl["n"], avl["avg_path"], 'b-', label='AVL', linewidth=2, alpha=0.7)
+    ax2.plot(rb["n"], rb["avg_path"], 'r-', label='RB', linewidth=2, alpha=0.7)
+    ax2.set_xlabel('Количество ключей (n)')
+    ax2.set_ylabel('Средняя длина пути вставки')
+    ax2.set_title('Средняя длина пути поиска места вставки')
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+
+    ax3.plot(avl["n"], avl["height"], 'b-', label='AVL', linewidth=2, alpha=0.7)
+    ax3.plot(rb["n"], rb["height"], 'r-', label='RB', linewidth=2, alpha=0.7)
+    ax3.set_xlabel('Количество ключей (n)')
+    ax3.set_ylabel('Высота дерева')
+    ax3.set_title('Высота дерева')
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.show()
+
+
 if __name__ == "__main__":
     Tree = BST()
 
@@ -876,15 +2809,25 @@ if __name__ == "__main__":
     for val in rb_values:
         rb_tree.insert(val)
     print("RB дерево после вставки значений:")
-    print(rb_tree)
+    rb_tree.render(annotate=True)
     print(f"Высота RB: {rb_tree.height()}")
     print(f"In-order RB: {rb_tree.inorder()}")
 
     rb_tree.delete(10)
     print("\nRB дерево после удаления 10:")
-    print(rb_tree)
+    rb_tree.render(annotate=True)
     print(f"Высота RB после удаления: {rb_tree.height()}")
 
+    print("\n=== ТЕСТ PERSISTENT AVL ===")
+    persistent_tree = PersistentAVL()
+    persistent_tree.insert_many(avl_values)
+    snapshot = persistent_tree.snapshot()
+    with_35 = persistent_tree.insert(35)
+    persistent_tree.delete(10)
+    print(f"Снимок до изменений: {snapshot.inorder()}")
+    print(f"Версия {with_35.version} после вставки 35: {with_35.inorder()}")
+    print(f"Текущая версия {persistent_tree.version}: {persistent_tree.inorder()}")
+
     print("\n=== ЗАПУСК ЭКСПЕРИМЕНТОВ ===")
 
     print("Эксперимент 1: BST со случайными ключами...")
@@ -892,4 +2835,8 @@ if __name__ == "__main__":
     print("Эксперимент 2: AVL и RB со случайными ключами...")
     plot_avl_rb_random_results()
     print("Эксперимент 3: AVL и RB с монотонно возрастающими ключами...")
-    plot_avl_rb_sorted_results()
\ No newline at end of file
+    plot_avl_rb_sorted_results()
+    print("Эксперимент 4: счётчики балансировки AVL и RB...")
+    plot_rebalance_stats()
+    print("Эксперимент 5: высота B-дерева разных порядков...")
+    plot_btree_results()
\ No newline at end of file